@@ -15,6 +15,12 @@ if TYPE_CHECKING:
 	from browser_use.browser.session import BrowserSession
 	from browser_use.browser.watchdogs.dom_watchdog import DOMWatchdog
 
+# Cleanup patterns are compiled once at import instead of going through re's pattern cache on every extraction
+_URL_ENCODING_RE = re.compile(r'%[0-9A-Fa-f]{2}')
+_CODE_JSON_RE = re.compile(r'`\{["\w].*?\}`', flags=re.DOTALL)
+_TYPED_JSON_RE = re.compile(r'\{"\$type":[^}]{100,}\}')
+_NESTED_JSON_RE = re.compile(r'\{"[^"]{5,}":\{[^}]{100,}\}')
+
 
 async def extract_clean_markdown(
 	browser_session: 'BrowserSession | None' = None,
@@ -81,7 +87,7 @@ async def extract_clean_markdown(
 	initial_markdown_length = len(content)
 
 	# Minimal cleanup - markdownify already does most of the work
-	content = re.sub(r'%[0-9A-Fa-f]{2}', '', content)  # Remove any remaining URL encoding
+	content = _URL_ENCODING_RE.sub('', content)  # Remove any remaining URL encoding
 
 	# Apply light preprocessing to clean up excessive whitespace
 	content, chars_filtered = _preprocess_markdown_content(content)
@@ -126,13 +132,12 @@ async def _get_enhanced_dom_tree_from_browser_session(browser_session: 'BrowserS
 # Legacy aliases removed - all code now uses the unified extract_clean_markdown function
 
 
-def _preprocess_markdown_content(content: str, max_newlines: int = 3) -> tuple[str, int]:
+def _preprocess_markdown_content(content: str) -> tuple[str, int]:
 	"""
 	Light preprocessing of markdown output - minimal cleanup with JSON blob removal.
 
 	Args:
 	    content: Markdown content to lightly filter
-	    max_newlines: Maximum consecutive newlines to allow
 
 	Returns:
 	    tuple: (filtered_content, chars_filtered)
@@ -143,12 +148,9 @@ def _preprocess_markdown_content(content: str, max_newlines: int = 3) -> tuple[s
 	# These are often embedded as `{"key":"value",...}` and can be massive
 	# Match JSON objects/arrays that are at least 100 chars long
 	# This catches SPA state/config data without removing small inline JSON
-	content = re.sub(r'`\{["\w].*?\}`', '', content, flags=re.DOTALL)  # Remove JSON in code blocks
-	content = re.sub(r'\{"\$type":[^}]{100,}\}', '', content)  # Remove JSON with $type fields (common pattern)
-	content = re.sub(r'\{"[^"]{5,}":\{[^}]{100,}\}', '', content)  # Remove nested JSON objects
-
-	# Compress consecutive newlines (4+ newlines become max_newlines)
-	content = re.sub(r'\n{4,}', '\n' * max_newlines, content)
+	content = _CODE_JSON_RE.sub('', content)  # Remove JSON in code blocks
+	content = _TYPED_JSON_RE.sub('', content)  # Remove JSON with $type fields (common pattern)
+	content = _NESTED_JSON_RE.sub('', content)  # Remove nested JSON objects
 
 	# Remove lines that are only whitespace or very short (likely artifacts)
 	lines = content.split('\n')
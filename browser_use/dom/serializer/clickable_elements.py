@@ -20,7 +20,7 @@ class ClickableElementDetector:
 
 		# IFRAME elements should be interactive if they're large enough to potentially need scrolling
 		# Small iframes (< 100px width or height) are unlikely to have scrollable content
-		if node.tag_name and node.tag_name.upper() == 'IFRAME' or node.tag_name.upper() == 'FRAME':
+		if node.tag_name in ('iframe', 'frame'):
 			if node.snapshot_node and node.snapshot_node.bounds:
 				width = node.snapshot_node.bounds.width
 				height = node.snapshot_node.bounds.height
@@ -107,8 +107,8 @@ class ClickableElementDetector:
 			'option',
 			'optgroup',
 		}
-		# Check with case-insensitive comparison
-		if node.tag_name and node.tag_name.lower() in interactive_tags:
+		# tag_name is already lowercased
+		if node.tag_name in interactive_tags:
 			return True
 
 		# SVG elements need special handling - only interactive if they have explicit handlers
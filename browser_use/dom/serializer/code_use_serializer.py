@@ -1,6 +1,7 @@
 # @file purpose: Ultra-compact serializer optimized for code-use agents
 # Focuses on minimal token usage while preserving essential interactive context
 
+from browser_use.dom.serializer.utils import collect_inline_text
 from browser_use.dom.utils import cap_text_length
 from browser_use.dom.views import (
 	EnhancedDOMTreeNode,
@@ -20,39 +21,51 @@ CODE_USE_KEY_ATTRIBUTES = [
 	'class',  # Keep top 2 classes for common selectors
 ]
 
+# Membership set and priority rank for CODE_USE_KEY_ATTRIBUTES, used by _build_minimal_attributes
+CODE_USE_KEY_ATTRIBUTES_SET = frozenset(CODE_USE_KEY_ATTRIBUTES)
+CODE_USE_KEY_ORDER = {attr: i for i, attr in enumerate(CODE_USE_KEY_ATTRIBUTES)}
+
+# Two class names are usually enough for a querySelector; values are cut short to keep the code-agent tree small
+CODE_USE_MAX_CLASSES = 2
+CODE_USE_MAX_ATTRIBUTE_LENGTH = 25
+
 # Interactive elements agent can use
-INTERACTIVE_ELEMENTS = {
-	'a',
-	'button',
-	'input',
-	'textarea',
-	'select',
-	'form',
-}
+INTERACTIVE_ELEMENTS = frozenset(
+	{
+		'a',
+		'button',
+		'input',
+		'textarea',
+		'select',
+		'form',
+	}
+)
 
 # Semantic structure elements - expanded to include more content containers
-SEMANTIC_STRUCTURE = {
-	'h1',
-	'h2',
-	'h3',
-	'h4',
-	'h5',
-	'h6',
-	'nav',
-	'main',
-	'header',
-	'footer',
-	'article',
-	'section',
-	'p',  # Paragraphs often contain prices and product info
-	'span',  # Spans often contain prices and labels
-	'div',  # Divs with useful attributes (id/class) should be shown
-	'ul',
-	'ol',
-	'li',
-	'label',
-	'img',
-}
+SEMANTIC_STRUCTURE = frozenset(
+	{
+		'h1',
+		'h2',
+		'h3',
+		'h4',
+		'h5',
+		'h6',
+		'nav',
+		'main',
+		'header',
+		'footer',
+		'article',
+		'section',
+		'p',  # Paragraphs often contain prices and product info
+		'span',  # Spans often contain prices and labels
+		'div',  # Divs with useful attributes (id/class) should be shown
+		'ul',
+		'ol',
+		'li',
+		'label',
+		'img',
+	}
+)
 
 
 class DOMCodeAgentSerializer:
@@ -72,27 +85,38 @@ class DOMCodeAgentSerializer:
 		if not node:
 			return ''
 
+		# _serialize_tree_into appends the code-agent lines here; they are joined once for the whole tree
+		output: list[str] = []
+		DOMCodeAgentSerializer._serialize_tree_into(node, output, include_attributes, depth)
+		return '\n'.join(output)
+
+	@staticmethod
+	def _serialize_tree_into(node: SimplifiedNode, output: list[str], include_attributes: list[str], depth: int) -> None:
+		"""Append the serialized lines for a node and its subtree to `output`."""
 		# Skip excluded/hidden nodes
-		if hasattr(node, 'excluded_by_parent') and node.excluded_by_parent:
-			return DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth)
+		if node.excluded_by_parent:
+			DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth)
+			return
 
 		if not node.should_display:
-			return DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth)
+			DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth)
+			return
 
-		formatted_text = []
 		depth_str = '  ' * depth  # Use 2 spaces instead of tabs for compactness
 
 		if node.original_node.node_type == NodeType.ELEMENT_NODE:
-			tag = node.original_node.tag_name.lower()
+			tag = node.original_node.tag_name
 			is_visible = node.original_node.snapshot_node and node.original_node.is_visible
 
 			# Skip invisible (except iframes)
 			if not is_visible and tag not in ['iframe', 'frame']:
-				return DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth)
+				DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth)
+				return
 
 			# Special handling for iframes
 			if tag in ['iframe', 'frame']:
-				return DOMCodeAgentSerializer._serialize_iframe(node, include_attributes, depth)
+				DOMCodeAgentSerializer._serialize_iframe(node, output, include_attributes, depth)
+				return
 
 			# Build minimal attributes
 			attributes_str = DOMCodeAgentSerializer._build_minimal_attributes(node.original_node)
@@ -101,15 +125,19 @@ class DOMCodeAgentSerializer:
 			is_interactive = tag in INTERACTIVE_ELEMENTS
 			is_semantic = tag in SEMANTIC_STRUCTURE
 			has_useful_attrs = bool(attributes_str)
-			has_text = DOMCodeAgentSerializer._has_direct_text(node)
+			# Single pass over the direct text children - yields both the inline text and whether there is any
+			inline_text = collect_inline_text(node, 40)
+			has_text = bool(inline_text)
 
 			# Skip non-semantic, non-interactive containers without attributes
 			if not is_interactive and not is_semantic and not has_useful_attrs and not has_text:
-				return DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth)
+				DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth)
+				return
 
 			# Collapse pointless wrappers
 			if tag in {'div', 'span'} and not has_useful_attrs and not has_text and len(node.children) == 1:
-				return DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth)
+				DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth)
+				return
 
 			# Build element
 			line = f'{depth_str}<{tag}'
@@ -118,19 +146,16 @@ class DOMCodeAgentSerializer:
 				line += f' {attributes_str}'
 
 			# Inline text
-			inline_text = DOMCodeAgentSerializer._get_inline_text(node)
 			if inline_text:
 				line += f'>{inline_text}'
 			else:
 				line += '>'
 
-			formatted_text.append(line)
+			output.append(line)
 
 			# Children (only if no inline text)
 			if node.children and not inline_text:
-				children_text = DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth + 1)
-				if children_text:
-					formatted_text.append(children_text)
+				DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth + 1)
 
 		elif node.original_node.node_type == NodeType.TEXT_NODE:
 			# Handled inline with parent
@@ -139,75 +164,48 @@ class DOMCodeAgentSerializer:
 		elif node.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
 			# Shadow DOM - minimal marker
 			if node.children:
-				formatted_text.append(f'{depth_str}#shadow')
-				children_text = DOMCodeAgentSerializer._serialize_children(node, include_attributes, depth + 1)
-				if children_text:
-					formatted_text.append(children_text)
-
-		return '\n'.join(formatted_text)
+				output.append(f'{depth_str}#shadow')
+				DOMCodeAgentSerializer._serialize_children(node, output, include_attributes, depth + 1)
 
 	@staticmethod
-	def _serialize_children(node: SimplifiedNode, include_attributes: list[str], depth: int) -> str:
+	def _serialize_children(node: SimplifiedNode, output: list[str], include_attributes: list[str], depth: int) -> None:
 		"""Serialize children."""
-		children_output = []
+		serialize_tree_into = DOMCodeAgentSerializer._serialize_tree_into
 		for child in node.children:
-			child_text = DOMCodeAgentSerializer.serialize_tree(child, include_attributes, depth)
-			if child_text:
-				children_output.append(child_text)
-		return '\n'.join(children_output)
+			serialize_tree_into(child, output, include_attributes, depth)
 
 	@staticmethod
 	def _build_minimal_attributes(node: EnhancedDOMTreeNode) -> str:
 		"""Build minimal but useful attributes - keep top 2 classes for selectors."""
-		attrs = []
+		node_attributes = node.attributes
+		if not node_attributes:
+			return ''
 
-		if node.attributes:
-			for attr in CODE_USE_KEY_ATTRIBUTES:
-				if attr in node.attributes:
-					value = str(node.attributes[attr]).strip()
-					if value:
-						# Special handling for class - keep only first 2 classes
-						if attr == 'class':
-							classes = value.split()[:2]
-							value = ' '.join(classes)
-						# Cap at 25 chars
-						value = cap_text_length(value, 25)
-						attrs.append(f'{attr}="{value}"')
+		attrs = []
+		# Walk the node's own attributes and restore priority order afterwards
+		matched = [attr for attr in node_attributes if attr in CODE_USE_KEY_ATTRIBUTES_SET]
+		if len(matched) > 1:
+			matched.sort(key=CODE_USE_KEY_ORDER.__getitem__)
+		for attr in matched:
+			raw_value = node_attributes[attr]
+			value = raw_value.strip() if isinstance(raw_value, str) else str(raw_value).strip()
+			if value:
+				# Special handling for class - keep only the first few classes without splitting the rest
+				if attr == 'class':
+					classes = value.split(None, CODE_USE_MAX_CLASSES)[:CODE_USE_MAX_CLASSES]
+					value = ' '.join(classes)
+				# Cap length (inlined cap_text_length)
+				if len(value) > CODE_USE_MAX_ATTRIBUTE_LENGTH:
+					value = value[:CODE_USE_MAX_ATTRIBUTE_LENGTH] + '...'
+				attrs.append(f'{attr}="{value}"')
 
 		return ' '.join(attrs)
 
 	@staticmethod
-	def _has_direct_text(node: SimplifiedNode) -> bool:
-		"""Check if node has direct text children."""
-		for child in node.children:
-			if child.original_node.node_type == NodeType.TEXT_NODE:
-				text = child.original_node.node_value.strip() if child.original_node.node_value else ''
-				if len(text) > 1:
-					return True
-		return False
-
-	@staticmethod
-	def _get_inline_text(node: SimplifiedNode) -> str:
-		"""Get inline text (max 80 chars for better context)."""
-		text_parts = []
-		for child in node.children:
-			if child.original_node.node_type == NodeType.TEXT_NODE:
-				text = child.original_node.node_value.strip() if child.original_node.node_value else ''
-				if text and len(text) > 1:
-					text_parts.append(text)
-
-		if not text_parts:
-			return ''
-
-		combined = ' '.join(text_parts)
-		return cap_text_length(combined, 40)
-
-	@staticmethod
-	def _serialize_iframe(node: SimplifiedNode, include_attributes: list[str], depth: int) -> str:
+	def _serialize_iframe(node: SimplifiedNode, output: list[str], include_attributes: list[str], depth: int) -> None:
 		"""Handle iframe minimally."""
-		formatted_text = []
 		depth_str = '  ' * depth
-		tag = node.original_node.tag_name.lower()
+		tag = node.original_node.tag_name
 
 		# Minimal iframe marker
 		attributes_str = DOMCodeAgentSerializer._build_minimal_attributes(node.original_node)
@@ -215,25 +213,21 @@ class DOMCodeAgentSerializer:
 		if attributes_str:
 			line += f' {attributes_str}'
 		line += '>'
-		formatted_text.append(line)
+		output.append(line)
 
 		# Iframe content
 		if node.original_node.content_document:
-			formatted_text.append(f'{depth_str}  #iframe-content')
+			output.append(f'{depth_str}  #iframe-content')
 
 			# Find and serialize body content only
 			for child_node in node.original_node.content_document.children_nodes or []:
-				if child_node.tag_name.lower() == 'html':
+				if child_node.tag_name == 'html':
 					for html_child in child_node.children:
-						if html_child.tag_name.lower() == 'body':
+						if html_child.tag_name == 'body':
 							for body_child in html_child.children:
-								DOMCodeAgentSerializer._serialize_document_node(
-									body_child, formatted_text, include_attributes, depth + 2
-								)
+								DOMCodeAgentSerializer._serialize_document_node(body_child, output, include_attributes, depth + 2)
 							break
 
-		return '\n'.join(formatted_text)
-
 	@staticmethod
 	def _serialize_document_node(
 		dom_node: EnhancedDOMTreeNode, output: list[str], include_attributes: list[str], depth: int
@@ -242,7 +236,7 @@ class DOMCodeAgentSerializer:
 		depth_str = '  ' * depth
 
 		if dom_node.node_type == NodeType.ELEMENT_NODE:
-			tag = dom_node.tag_name.lower()
+			tag = dom_node.tag_name
 
 			# Skip invisible
 			is_visible = dom_node.snapshot_node and dom_node.is_visible
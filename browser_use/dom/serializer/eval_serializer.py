@@ -1,6 +1,7 @@
 # @file purpose: Concise evaluation serializer for DOM trees - optimized for LLM query writing
 
 
+from browser_use.dom.serializer.utils import collect_inline_text
 from browser_use.dom.utils import cap_text_length
 from browser_use.dom.views import (
 	EnhancedDOMTreeNode,
@@ -47,66 +48,84 @@ EVAL_KEY_ATTRIBUTES = [
 	'aria-valuenow',
 ]
 
+# Precomputed lookups so attribute filtering only walks the attributes a node actually has
+EVAL_KEY_ATTRIBUTES_SET = frozenset(EVAL_KEY_ATTRIBUTES)
+EVAL_KEY_ORDER = {attr: i for i, attr in enumerate(EVAL_KEY_ATTRIBUTES)}
+
+# Attribute value shaping: class keeps its first few names, every other value is capped in length
+EVAL_MAX_CLASSES = 3
+EVAL_MAX_ATTRIBUTE_LENGTH = 80
+
 # Semantic elements that should always be shown
-SEMANTIC_ELEMENTS = {
-	'html',  # Always show document root
-	'body',  # Always show body
-	'h1',
-	'h2',
-	'h3',
-	'h4',
-	'h5',
-	'h6',
-	'a',
-	'button',
-	'input',
-	'textarea',
-	'select',
-	'form',
-	'label',
-	'nav',
-	'header',
-	'footer',
-	'main',
-	'article',
-	'section',
-	'table',
-	'thead',
-	'tbody',
-	'tr',
-	'th',
-	'td',
-	'ul',
-	'ol',
-	'li',
-	'img',
-	'iframe',
-	'video',
-	'audio',
-}
+SEMANTIC_ELEMENTS = frozenset(
+	{
+		'html',  # Always show document root
+		'body',  # Always show body
+		'h1',
+		'h2',
+		'h3',
+		'h4',
+		'h5',
+		'h6',
+		'a',
+		'button',
+		'input',
+		'textarea',
+		'select',
+		'form',
+		'label',
+		'nav',
+		'header',
+		'footer',
+		'main',
+		'article',
+		'section',
+		'table',
+		'thead',
+		'tbody',
+		'tr',
+		'th',
+		'td',
+		'ul',
+		'ol',
+		'li',
+		'img',
+		'iframe',
+		'video',
+		'audio',
+	}
+)
 
 # Container elements that can be collapsed if they only wrap one child
-COLLAPSIBLE_CONTAINERS = {'div', 'span', 'section', 'article'}
+COLLAPSIBLE_CONTAINERS = frozenset({'div', 'span', 'section', 'article'})
+
+# Container elements that should be shown even if invisible (might have visible children)
+CONTAINER_TAGS = frozenset({'html', 'body', 'div', 'main', 'section', 'article', 'aside', 'header', 'footer', 'nav'})
+
+# Frame elements whose content document is serialized inline
+FRAME_TAGS = frozenset({'iframe', 'frame'})
 
 # SVG child elements to skip (decorative only, no interaction value)
-SVG_ELEMENTS = {
-	'path',
-	'rect',
-	'g',
-	'circle',
-	'ellipse',
-	'line',
-	'polyline',
-	'polygon',
-	'use',
-	'defs',
-	'clipPath',
-	'mask',
-	'pattern',
-	'image',
-	'text',
-	'tspan',
-}
+SVG_ELEMENTS = frozenset(
+	{
+		'path',
+		'rect',
+		'g',
+		'circle',
+		'ellipse',
+		'line',
+		'polyline',
+		'polygon',
+		'use',
+		'defs',
+		'clipPath',
+		'mask',
+		'pattern',
+		'image',
+		'text',
+		'tspan',
+	}
+)
 
 
 class DOMEvalSerializer:
@@ -126,120 +145,140 @@ class DOMEvalSerializer:
 		if not node:
 			return ''
 
-		# Skip excluded nodes but process children
-		if hasattr(node, 'excluded_by_parent') and node.excluded_by_parent:
-			return DOMEvalSerializer._serialize_children(node, include_attributes, depth)
+		# Find the nodes whose subtree produces output once per pass, so empty subtrees are skipped in O(1)
+		with_output: set[int] = set()
+		DOMEvalSerializer._mark_subtree_output(node, with_output)
+
+		# Iterative depth-first walk over an explicit stack. Entries are either a node to visit with its depth, or a
+		# ready-made line (truncation markers). Children are pushed in reverse so they pop in document order, and
+		# every line goes into one shared buffer that is joined once at the end.
+		output: list[str] = []
+		append_output = output.append
+		push_children = DOMEvalSerializer._push_children
+		build_compact_attributes = DOMEvalSerializer._build_compact_attributes
+		element_node = NodeType.ELEMENT_NODE
+		fragment_node = NodeType.DOCUMENT_FRAGMENT_NODE
+		stack: list[tuple[SimplifiedNode, int] | str] = [(node, depth)]
+		while stack:
+			item = stack.pop()
+			if isinstance(item, str):
+				append_output(item)
+				continue
+			node, depth = item
+
+			if id(node) not in with_output:
+				continue
+
+			# Skip excluded nodes and nodes marked as should_display=False, but process their children
+			if node.excluded_by_parent or not node.should_display:
+				push_children(node, stack, depth, with_output)
+				continue
 
-		# Skip nodes marked as should_display=False
-		if not node.should_display:
-			return DOMEvalSerializer._serialize_children(node, include_attributes, depth)
+			depth_str = depth * '\t'
+			orig = node.original_node
+			node_type = orig.node_type
 
-		formatted_text = []
-		depth_str = depth * '\t'
+			if node_type == element_node:
+				# tag_name is already lowercased by EnhancedDOMTreeNode, compute it once per visit
+				tag = orig.tag_name
+				is_visible = orig.snapshot_node and orig.is_visible
+
+				# Skip invisible elements UNLESS they're containers or iframes (which might have visible children)
+				if not is_visible and tag not in CONTAINER_TAGS and tag not in FRAME_TAGS:
+					push_children(node, stack, depth, with_output)
+					continue
 
-		if node.original_node.node_type == NodeType.ELEMENT_NODE:
-			tag = node.original_node.tag_name.lower()
-			is_visible = node.original_node.snapshot_node and node.original_node.is_visible
+				# Special handling for iframes - show them with their content
+				if tag in FRAME_TAGS:
+					DOMEvalSerializer._serialize_iframe(node, output, include_attributes, depth)
+					continue
 
-			# Container elements that should be shown even if invisible (might have visible children)
-			container_tags = {'html', 'body', 'div', 'main', 'section', 'article', 'aside', 'header', 'footer', 'nav'}
+				# Skip SVG elements entirely - they're just decorative graphics with no interaction value
+				# Show the <svg> tag itself to indicate graphics, but don't recurse into children
+				if tag == 'svg':
+					parts = [depth_str]
+					# Add [i_X] for interactive SVG elements only
+					if node.is_interactive:
+						parts += ('[i_', str(orig.backend_node_id), '] ')
+					parts.append('<svg')
+					attributes_str = build_compact_attributes(orig)
+					if attributes_str:
+						parts += (' ', attributes_str)
+					parts.append(' /> <!-- SVG content collapsed -->')
+					append_output(''.join(parts))
+					continue
 
-			# Skip invisible elements UNLESS they're containers or iframes (which might have visible children)
-			if not is_visible and tag not in container_tags and tag not in ['iframe', 'frame']:
-				return DOMEvalSerializer._serialize_children(node, include_attributes, depth)
+				# Skip SVG child elements entirely (path, rect, g, circle, etc.)
+				if tag in SVG_ELEMENTS:
+					continue
 
-			# Special handling for iframes - show them with their content
-			if tag in ['iframe', 'frame']:
-				return DOMEvalSerializer._serialize_iframe(node, include_attributes, depth)
+				# Build compact attributes string
+				attributes_str = build_compact_attributes(orig)
 
-			# Skip SVG elements entirely - they're just decorative graphics with no interaction value
-			# Show the <svg> tag itself to indicate graphics, but don't recurse into children
-			if tag == 'svg':
-				line = f'{depth_str}'
-				# Add [i_X] for interactive SVG elements only
-				if node.is_interactive:
-					line += f'[i_{node.original_node.backend_node_id}] '
-				line += '<svg'
-				attributes_str = DOMEvalSerializer._build_compact_attributes(node.original_node)
-				if attributes_str:
-					line += f' {attributes_str}'
-				line += ' /> <!-- SVG content collapsed -->'
-				return line
-
-			# Skip SVG child elements entirely (path, rect, g, circle, etc.)
-			if tag in SVG_ELEMENTS:
-				return ''
-
-			# Build compact attributes string
-			attributes_str = DOMEvalSerializer._build_compact_attributes(node.original_node)
-
-			# Decide if this element should be shown
-			is_semantic = tag in SEMANTIC_ELEMENTS
-			has_useful_attrs = bool(attributes_str)
-			has_text_content = DOMEvalSerializer._has_direct_text(node)
-			has_children = len(node.children) > 0
-
-			# Build compact element representation
-			line = f'{depth_str}'
-			# Add backend node ID notation - [i_X] for interactive elements only
-			if node.is_interactive:
-				line += f'[i_{node.original_node.backend_node_id}] '
-			# Non-interactive elements don't get an index notation
-			line += f'<{tag}'
+				# Joined text of the direct text children, shown inline after the tag
+				inline_text = collect_inline_text(node, 80)
 
-			if attributes_str:
-				line += f' {attributes_str}'
+				# Build compact element representation from parts, joined once into the final line
+				parts = [depth_str]
+				# Add backend node ID notation - [i_X] for interactive elements only
+				if node.is_interactive:
+					parts += ('[i_', str(orig.backend_node_id), '] ')
+				# Non-interactive elements don't get an index notation
+				parts += ('<', tag)
 
-			# Add scroll info if element is scrollable
-			if node.original_node.should_show_scroll_info:
-				scroll_text = node.original_node.get_scroll_info_text()
-				if scroll_text:
-					line += f' scroll="{scroll_text}"'
+				if attributes_str:
+					parts += (' ', attributes_str)
 
-			# Add inline text if present (keep it on same line for compactness)
-			inline_text = DOMEvalSerializer._get_inline_text(node)
+				# Add scroll info if element is scrollable
+				if orig.should_show_scroll_info:
+					scroll_text = orig.get_scroll_info_text()
+					if scroll_text:
+						parts += (' scroll="', scroll_text, '"')
 
-			# For containers (html, body, div, etc.), always show children even if there's inline text
-			# For other elements, inline text replaces children (more compact)
-			is_container = tag in container_tags
+				# For containers (html, body, div, etc.), always show children even if there's inline text
+				# For other elements, inline text replaces children (more compact)
+				is_container = tag in CONTAINER_TAGS
 
-			if inline_text and not is_container:
-				line += f'>{inline_text}'
-			else:
-				line += ' />'
+				if inline_text and not is_container:
+					parts += ('>', inline_text)
+				else:
+					parts.append(' />')
 
-			formatted_text.append(line)
+				append_output(''.join(parts))
 
-			# Process children (always for containers, only if no inline_text for others)
-			if has_children and (is_container or not inline_text):
-				children_text = DOMEvalSerializer._serialize_children(node, include_attributes, depth + 1)
-				if children_text:
-					formatted_text.append(children_text)
+				# Process children (always for containers, only if no inline_text for others)
+				if node.children and (is_container or not inline_text):
+					push_children(node, stack, depth + 1, with_output)
 
-		elif node.original_node.node_type == NodeType.TEXT_NODE:
-			# Text nodes are handled inline with their parent
-			pass
+			# Text nodes are handled inline with their parent, so only shadow roots remain
+			elif node_type == fragment_node:
+				# Shadow DOM - just show children directly with minimal marker
+				if node.children:
+					append_output(f'{depth_str}#shadow')
+					push_children(node, stack, depth + 1, with_output)
 
-		elif node.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
-			# Shadow DOM - just show children directly with minimal marker
-			if node.children:
-				formatted_text.append(f'{depth_str}#shadow')
-				children_text = DOMEvalSerializer._serialize_children(node, include_attributes, depth + 1)
-				if children_text:
-					formatted_text.append(children_text)
+		return '\n'.join(output)
 
-		return '\n'.join(formatted_text)
+	@staticmethod
+	def _push_children(
+		node: SimplifiedNode, stack: list[tuple[SimplifiedNode, int] | str], depth: int, with_output: set[int]
+	) -> None:
+		"""Push the children of a node onto the serialize_tree stack, applying list/link truncation."""
+		plan = DOMEvalSerializer._plan_children(node, depth, with_output)
+		if plan is None:
+			# Fast path for the vast majority of nodes: no per-child counter bookkeeping
+			stack.extend((child, depth) for child in reversed(node.children) if id(child) in with_output)
+		else:
+			stack.extend(reversed(plan))
 
 	@staticmethod
-	def _serialize_children(node: SimplifiedNode, include_attributes: list[str], depth: int) -> str:
-		"""Helper to serialize all children of a node."""
-		children_output = []
+	def _plan_children(node: SimplifiedNode, depth: int, with_output: set[int]) -> list[tuple[SimplifiedNode, int] | str] | None:
+		"""Plan the children and truncation markers to push for a node, or None if no truncation can apply."""
+		element_node = NodeType.ELEMENT_NODE
 
 		# Check if parent is a list container (ul, ol)
-		is_list_container = node.original_node.node_type == NodeType.ELEMENT_NODE and node.original_node.tag_name.lower() in [
-			'ul',
-			'ol',
-		]
+		orig = node.original_node
+		is_list_container = orig.node_type == element_node and orig.tag_name in ('ul', 'ol')
 
 		# Track list items and consecutive links
 		li_count = 0
@@ -248,11 +287,25 @@ class DOMEvalSerializer:
 		max_consecutive_links = 50
 		total_links_skipped = 0
 
-		for child in node.children:
+		children = node.children
+		# Truncation can only kick in for long lists or long runs of links - decide that once up front
+		can_truncate = (is_list_container and len(children) > max_list_items) or (
+			len(children) > max_consecutive_links
+			and any(child.original_node.node_type == element_node and child.original_node.tag_name == 'a' for child in children)
+		)
+		if not can_truncate:
+			return None
+
+		# Plan pass: walk the tags once to decide which children survive truncation and where the
+		# truncation markers go, so only children that will render are pushed
+		plan: list[tuple[SimplifiedNode, int] | str] = []
+		add_to_plan = plan.append
+		for child in children:
 			# Get tag name for this child
 			current_tag = None
-			if child.original_node.node_type == NodeType.ELEMENT_NODE:
-				current_tag = child.original_node.tag_name.lower()
+			child_orig = child.original_node
+			if child_orig.node_type == element_node:
+				current_tag = child_orig.tag_name
 
 			# If we're in a list container and this child is an li element
 			if is_list_container and current_tag == 'li':
@@ -273,156 +326,189 @@ class DOMEvalSerializer:
 				# But first add truncation message if we skipped links
 				if total_links_skipped > 0:
 					depth_str = depth * '\t'
-					children_output.append(f'{depth_str}... ({total_links_skipped} more links in this list)')
+					add_to_plan(f'{depth_str}... ({total_links_skipped} more links in this list)')
 					total_links_skipped = 0
 				consecutive_link_count = 0
 
-			child_text = DOMEvalSerializer.serialize_tree(child, include_attributes, depth)
-			if child_text:
-				children_output.append(child_text)
+			# Subtree renders nothing - never dispatch it (counters above still see the child)
+			if id(child) in with_output:
+				add_to_plan((child, depth))
 
 		# Add truncation message if we skipped items at the end
 		if is_list_container and li_count > max_list_items:
 			depth_str = depth * '\t'
-			children_output.append(
+			add_to_plan(
 				f'{depth_str}... ({li_count - max_list_items} more items in this list (truncated) use evaluate to get more.'
 			)
 
 		# Add truncation message for links if we skipped any at the end
 		if total_links_skipped > 0:
 			depth_str = depth * '\t'
-			children_output.append(
-				f'{depth_str}... ({total_links_skipped} more links in this list) (truncated) use evaluate to get more.'
-			)
+			add_to_plan(f'{depth_str}... ({total_links_skipped} more links in this list) (truncated) use evaluate to get more.')
+
+		return plan
+
+	@staticmethod
+	def _mark_subtree_output(node: SimplifiedNode, with_output: set[int]) -> None:
+		"""Add the id of every node in the subtree that produces output to `with_output`, mirroring the rules in serialize_tree.
+
+		A node that only passes its children through still produces output when those children trigger a list or link
+		truncation marker, even if none of them renders anything itself.
+		"""
+		# Collect the subtree in pre-order, then sweep it in reverse so every child is flagged before its parent
+		order: list[SimplifiedNode] = []
+		stack = [node]
+		while stack:
+			current = stack.pop()
+			order.append(current)
+			stack.extend(current.children)
+
+		element_node = NodeType.ELEMENT_NODE
+		fragment_node = NodeType.DOCUMENT_FRAGMENT_NODE
+		plan_children = DOMEvalSerializer._plan_children
+		for current in reversed(order):
+			original_node = current.original_node
+			node_type = original_node.node_type
+			if current.excluded_by_parent or not current.should_display:
+				passes_through = True
+			elif node_type == element_node:
+				tag = original_node.tag_name
+				is_visible = original_node.snapshot_node and original_node.is_visible
+				passes_through = not is_visible and tag not in CONTAINER_TAGS and tag not in FRAME_TAGS
+			else:
+				passes_through = False
+
+			if passes_through:
+				# Children that render nothing still count towards the list and link caps, so check for markers too
+				has_output = any(id(child) in with_output for child in current.children)
+				if not has_output:
+					plan = plan_children(current, 0, with_output)
+					has_output = plan is not None and any(isinstance(item, str) for item in plan)
+			elif node_type == element_node:
+				# Every other element emits its own line, except SVG children which are dropped entirely
+				has_output = original_node.tag_name not in SVG_ELEMENTS
+			elif node_type == fragment_node:
+				has_output = bool(current.children)
+			else:
+				has_output = False
 
-		return '\n'.join(children_output)
+			if has_output:
+				with_output.add(id(current))
 
 	@staticmethod
 	def _build_compact_attributes(node: EnhancedDOMTreeNode) -> str:
 		"""Build ultra-compact attributes string with only key attributes."""
-		attrs = []
+		# Attribute-less elements (layout wrappers) are common - nothing to build, and no role is added from the AX node
+		node_attributes = node.attributes
+		if not node_attributes:
+			return ''
+
+		# Interleaved name/value/separator pieces joined once at the end - no per-attribute intermediate strings
+		parts: list[str] = []
 
 		# Prioritize attributes that help with query writing
-		if node.attributes:
-			for attr in EVAL_KEY_ATTRIBUTES:
-				if attr in node.attributes:
-					value = str(node.attributes[attr]).strip()
-					if not value:
-						continue
-
-					# Special handling for different attributes
-					if attr == 'class':
-						# For class, limit to first 2 classes to save space
-						classes = value.split()[:3]
-						value = ' '.join(classes)
-					elif attr == 'href':
-						# For href, cap at 20 chars to save space
-						value = cap_text_length(value, 80)
-					else:
-						# Cap at 25 chars for other attributes
-						value = cap_text_length(value, 80)
-
-					attrs.append(f'{attr}="{value}"')
+		# Most elements carry only a handful of attributes, so walk those and restore priority order afterwards
+		if len(node_attributes) <= len(EVAL_KEY_ATTRIBUTES_SET):
+			matched = [attr for attr in node_attributes if attr in EVAL_KEY_ATTRIBUTES_SET]
+			if len(matched) > 1:
+				matched.sort(key=EVAL_KEY_ORDER.__getitem__)
+		else:
+			matched = [attr for attr in EVAL_KEY_ATTRIBUTES if attr in node_attributes]
+
+		for attr in matched:
+			raw_value = node_attributes[attr]
+			value = raw_value.strip() if isinstance(raw_value, str) else str(raw_value).strip()
+			if not value:
+				continue
+
+			# Special handling for different attributes
+			if attr == 'class':
+				# For class, limit to the first few classes to save space - no need to split the whole list
+				value = ' '.join(value.split(None, EVAL_MAX_CLASSES)[:EVAL_MAX_CLASSES])
+			elif len(value) > EVAL_MAX_ATTRIBUTE_LENGTH:
+				# Cap other attributes (inlined cap_text_length)
+				value = value[:EVAL_MAX_ATTRIBUTE_LENGTH] + '...'
+
+			parts += (attr, '="', value, '" ')
 
 		# Note: We intentionally don't add role from ax_node here because:
 		# 1. If role is explicitly set in HTML, it's already captured above via EVAL_KEY_ATTRIBUTES
 		# 2. Inferred roles from AX tree (like link, listitem, LineBreak) are redundant with the tag name
 		# 3. This reduces noise - <a href="..." role="link"> is redundant, we already know <a> is a link
 
-		return ' '.join(attrs)
-
-	@staticmethod
-	def _has_direct_text(node: SimplifiedNode) -> bool:
-		"""Check if node has direct text children (not nested in other elements)."""
-		for child in node.children:
-			if child.original_node.node_type == NodeType.TEXT_NODE:
-				text = child.original_node.node_value.strip() if child.original_node.node_value else ''
-				if len(text) > 1:
-					return True
-		return False
-
-	@staticmethod
-	def _get_inline_text(node: SimplifiedNode) -> str:
-		"""Get text content to display inline (max 40 chars)."""
-		text_parts = []
-		for child in node.children:
-			if child.original_node.node_type == NodeType.TEXT_NODE:
-				text = child.original_node.node_value.strip() if child.original_node.node_value else ''
-				if text and len(text) > 1:
-					text_parts.append(text)
-
-		if not text_parts:
+		if not parts:
 			return ''
-
-		combined = ' '.join(text_parts)
-		return cap_text_length(combined, 80)
+		# Drop the trailing separator after the last value
+		parts[-1] = '"'
+		return ''.join(parts)
 
 	@staticmethod
-	def _serialize_iframe(node: SimplifiedNode, include_attributes: list[str], depth: int) -> str:
+	def _serialize_iframe(node: SimplifiedNode, output: list[str], include_attributes: list[str], depth: int) -> None:
 		"""Handle iframe serialization with content document."""
-		formatted_text = []
 		depth_str = depth * '\t'
-		tag = node.original_node.tag_name.lower()
+		orig = node.original_node
+		tag = orig.tag_name
 
 		# Build minimal iframe marker with key attributes
-		attributes_str = DOMEvalSerializer._build_compact_attributes(node.original_node)
+		attributes_str = DOMEvalSerializer._build_compact_attributes(orig)
 		line = f'{depth_str}<{tag}'
 		if attributes_str:
 			line += f' {attributes_str}'
 
 		# Add scroll info for iframe content
-		if node.original_node.should_show_scroll_info:
-			scroll_text = node.original_node.get_scroll_info_text()
+		if orig.should_show_scroll_info:
+			scroll_text = orig.get_scroll_info_text()
 			if scroll_text:
 				line += f' scroll="{scroll_text}"'
 
 		line += ' />'
-		formatted_text.append(line)
+		output.append(line)
 
 		# If iframe has content document, serialize its content
-		if node.original_node.content_document:
+		content_document = orig.content_document
+		if content_document:
 			# Add marker for iframe content
-			formatted_text.append(f'{depth_str}\t#iframe-content')
+			output.append(f'{depth_str}\t#iframe-content')
 
-			# Process content document children
-			for child_node in node.original_node.content_document.children_nodes or []:
+			# Collect the content roots, then walk them all in a single pass straight into the shared buffer
+			roots: list[tuple[EnhancedDOMTreeNode, int]] = []
+			for child_node in content_document.children_nodes or []:
 				# Process html documents
-				if child_node.tag_name.lower() == 'html':
+				if child_node.tag_name == 'html':
 					# Find and serialize body content only (skip head)
-					for html_child in child_node.children:
-						if html_child.tag_name.lower() == 'body':
-							for body_child in html_child.children:
-								# Recursively process body children (iframe content)
-								DOMEvalSerializer._serialize_document_node(
-									body_child, formatted_text, include_attributes, depth + 2, is_iframe_content=True
-								)
-							break  # Stop after processing body
+					body = next((html_child for html_child in child_node.children if html_child.tag_name == 'body'), None)
+					if body is not None:
+						roots.extend((body_child, depth + 2) for body_child in body.children)
 				else:
 					# Not an html element - serialize directly
-					DOMEvalSerializer._serialize_document_node(
-						child_node, formatted_text, include_attributes, depth + 1, is_iframe_content=True
-					)
+					roots.append((child_node, depth + 1))
 
-		return '\n'.join(formatted_text)
+			DOMEvalSerializer._serialize_document_nodes(roots, output, include_attributes, is_iframe_content=True)
 
 	@staticmethod
-	def _serialize_document_node(
-		dom_node: EnhancedDOMTreeNode,
+	def _serialize_document_nodes(
+		roots: list[tuple[EnhancedDOMTreeNode, int]],
 		output: list[str],
 		include_attributes: list[str],
-		depth: int,
 		is_iframe_content: bool = True,
 	) -> None:
-		"""Helper to serialize a document node without SimplifiedNode wrapper.
+		"""Helper to serialize document nodes (each with its starting depth) without SimplifiedNode wrapper.
 
 		Args:
 			is_iframe_content: If True, be more permissive with visibility checks since
 				iframe content might not have snapshot data from parent page.
 		"""
-		depth_str = depth * '\t'
-
-		if dom_node.node_type == NodeType.ELEMENT_NODE:
-			tag = dom_node.tag_name.lower()
+		element_node = NodeType.ELEMENT_NODE
+		text_node = NodeType.TEXT_NODE
+		build_compact_attributes = DOMEvalSerializer._build_compact_attributes
+		append_output = output.append
+
+		# Iterative depth-first walk - children are pushed in reverse so they pop in document order
+		stack = roots[::-1]
+		while stack:
+			dom_node, depth = stack.pop()
+			if dom_node.node_type != element_node:
+				continue
 
 			# For iframe content, be permissive - show all semantic elements even without snapshot data
 			# For regular content, skip invisible elements
@@ -435,29 +521,29 @@ class DOMEvalSerializer:
 				is_visible = dom_node.snapshot_node and dom_node.is_visible
 
 			if not is_visible:
-				return
+				continue
+
+			tag = dom_node.tag_name
+			children = dom_node.children
 
 			# Check if semantic or has useful attributes
-			is_semantic = tag in SEMANTIC_ELEMENTS
-			attributes_str = DOMEvalSerializer._build_compact_attributes(dom_node)
+			attributes_str = build_compact_attributes(dom_node)
 
-			if not is_semantic and not attributes_str:
-				# Skip but process children
-				for child in dom_node.children:
-					DOMEvalSerializer._serialize_document_node(
-						child, output, include_attributes, depth, is_iframe_content=is_iframe_content
-					)
-				return
+			if tag not in SEMANTIC_ELEMENTS and not attributes_str:
+				# Skip but process children at the same depth
+				stack.extend((child, depth) for child in reversed(children))
+				continue
 
 			# Build element line
+			depth_str = depth * '\t'
 			line = f'{depth_str}<{tag}'
 			if attributes_str:
 				line += f' {attributes_str}'
 
 			# Get direct text content
 			text_parts = []
-			for child in dom_node.children:
-				if child.node_type == NodeType.TEXT_NODE and child.node_value:
+			for child in children:
+				if child.node_type == text_node and child.node_value:
 					text = child.node_value.strip()
 					if text and len(text) > 1:
 						text_parts.append(text)
@@ -468,11 +554,8 @@ class DOMEvalSerializer:
 			else:
 				line += ' />'
 
-			output.append(line)
+			append_output(line)
 
 			# Process non-text children
-			for child in dom_node.children:
-				if child.node_type != NodeType.TEXT_NODE:
-					DOMEvalSerializer._serialize_document_node(
-						child, output, include_attributes, depth + 1, is_iframe_content=is_iframe_content
-					)
+			child_depth = depth + 1
+			stack.extend((child, child_depth) for child in reversed(children) if child.node_type != text_node)
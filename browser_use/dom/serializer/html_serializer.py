@@ -2,6 +2,31 @@
 
 from browser_use.dom.views import EnhancedDOMTreeNode, NodeType
 
+# Non-content elements that are dropped together with their subtree
+SKIP_ELEMENTS = frozenset({'style', 'script', 'head', 'meta', 'link', 'title'})
+
+# Void elements (self-closing), built once instead of per element
+VOID_ELEMENTS = frozenset(
+	{
+		'area',
+		'base',
+		'br',
+		'col',
+		'embed',
+		'hr',
+		'img',
+		'input',
+		'link',
+		'meta',
+		'param',
+		'source',
+		'track',
+		'wbr',
+	}
+)
+
+FRAME_ELEMENTS = frozenset({'iframe', 'frame'})
+
 
 class HTMLSerializer:
 	"""Serializes enhanced DOM trees back to HTML format.
@@ -24,140 +49,105 @@ class HTMLSerializer:
 		"""
 		self.extract_links = extract_links
 
-	def serialize(self, node: EnhancedDOMTreeNode, depth: int = 0) -> str:
+	def serialize(self, node: EnhancedDOMTreeNode) -> str:
 		"""Serialize an enhanced DOM tree node to HTML.
 
 		Args:
 			node: The enhanced DOM tree node to serialize
-			depth: Current depth for indentation (internal use)
 
 		Returns:
 			HTML string representation of the node and its descendants
 		"""
-		if node.node_type == NodeType.DOCUMENT_NODE:
-			# Process document root - serialize all children
-			parts = []
-			for child in node.children_and_shadow_roots:
-				child_html = self.serialize(child, depth)
-				if child_html:
-					parts.append(child_html)
-			return ''.join(parts)
-
-		elif node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
-			# Shadow DOM root - wrap in template with shadowrootmode attribute
-			parts = []
-
-			# Add shadow root opening
-			shadow_type = node.shadow_root_type or 'open'
-			parts.append(f'<template shadowroot="{shadow_type.lower()}">')
-
-			# Serialize shadow children
-			for child in node.children:
-				child_html = self.serialize(child, depth + 1)
-				if child_html:
-					parts.append(child_html)
-
-			# Close shadow root
-			parts.append('</template>')
-
-			return ''.join(parts)
-
-		elif node.node_type == NodeType.ELEMENT_NODE:
-			parts = []
-			tag_name = node.tag_name.lower()
-
-			# Skip non-content elements
-			if tag_name in {'style', 'script', 'head', 'meta', 'link', 'title'}:
-				return ''
-
-			# Skip code tags with display:none - these often contain JSON state for SPAs
-			if tag_name == 'code' and node.attributes:
-				style = node.attributes.get('style', '')
-				# Check if element is hidden (display:none) - likely JSON data
-				if 'display:none' in style.replace(' ', '') or 'display: none' in style:
-					return ''
-				# Also check for bpr-guid IDs (LinkedIn's JSON data pattern)
-				element_id = node.attributes.get('id', '')
-				if 'bpr-guid' in element_id or 'data' in element_id or 'state' in element_id:
-					return ''
-
-			# Skip base64 inline images - these are usually placeholders or tracking pixels
-			if tag_name == 'img' and node.attributes:
-				src = node.attributes.get('src', '')
-				if src.startswith('data:image/'):
-					return ''
-
-			# Opening tag
-			parts.append(f'<{tag_name}')
-
-			# Add attributes
-			if node.attributes:
-				attrs = self._serialize_attributes(node.attributes)
-				if attrs:
-					parts.append(' ' + attrs)
-
-			# Handle void elements (self-closing)
-			void_elements = {
-				'area',
-				'base',
-				'br',
-				'col',
-				'embed',
-				'hr',
-				'img',
-				'input',
-				'link',
-				'meta',
-				'param',
-				'source',
-				'track',
-				'wbr',
-			}
-			if tag_name in void_elements:
-				parts.append(' />')
-				return ''.join(parts)
-
-			parts.append('>')
-
-			# Handle iframe content document
-			if tag_name in {'iframe', 'frame'} and node.content_document:
-				# Serialize iframe content
-				for child in node.content_document.children_nodes or []:
-					child_html = self.serialize(child, depth + 1)
-					if child_html:
-						parts.append(child_html)
-			else:
-				# Serialize shadow roots FIRST (for declarative shadow DOM)
-				if node.shadow_roots:
-					for shadow_root in node.shadow_roots:
-						child_html = self.serialize(shadow_root, depth + 1)
-						if child_html:
-							parts.append(child_html)
-
-				# Then serialize light DOM children (for slot projection)
-				for child in node.children:
-					child_html = self.serialize(child, depth + 1)
-					if child_html:
-						parts.append(child_html)
-
-			# Closing tag
-			parts.append(f'</{tag_name}>')
-
-			return ''.join(parts)
-
-		elif node.node_type == NodeType.TEXT_NODE:
-			# Return text content with basic HTML escaping
-			if node.node_value:
-				return self._escape_html(node.node_value)
-			return ''
-
-		elif node.node_type == NodeType.COMMENT_NODE:
-			# Skip comments to reduce noise
-			return ''
-
-		else:
-			# Unknown node type - skip
-			return ''
+		# Walk the tree with an explicit stack instead of recursing per node, so deep pages cannot hit
+		# the recursion limit. Closing markup is pushed as a plain string before the node's children.
+		output: list[str] = []
+		stack: list[EnhancedDOMTreeNode | str] = [node]
+		while stack:
+			item = stack.pop()
+			if isinstance(item, str):
+				output.append(item)
+				continue
+
+			if item.node_type == NodeType.DOCUMENT_NODE:
+				# Process document root - serialize all children, then shadow roots. Pushed straight from
+				# the node's own lists to skip the merged copy children_and_shadow_roots would build
+				if item.shadow_roots:
+					stack.extend(reversed(item.shadow_roots))
+				stack.extend(reversed(item.children))
+
+			elif item.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
+				# Shadow DOM root - wrap in template with shadowrootmode attribute
+				shadow_type = item.shadow_root_type or 'open'
+				output.append(f'<template shadowroot="{shadow_type.lower()}">')
+
+				# Close shadow root after its children
+				stack.append('</template>')
+				stack.extend(reversed(item.children))
+
+			elif item.node_type == NodeType.ELEMENT_NODE:
+				tag_name = item.tag_name
+				attributes = item.attributes
+
+				# Skip non-content elements
+				if tag_name in SKIP_ELEMENTS:
+					continue
+
+				# Skip code tags with display:none - these often contain JSON state for SPAs
+				if tag_name == 'code' and attributes:
+					style = attributes.get('style', '')
+					# Check if element is hidden (display:none) - likely JSON data
+					if 'display:none' in style.replace(' ', '') or 'display: none' in style:
+						continue
+					# Also check for bpr-guid IDs (LinkedIn's JSON data pattern)
+					element_id = attributes.get('id', '')
+					if 'bpr-guid' in element_id or 'data' in element_id or 'state' in element_id:
+						continue
+
+				# Skip base64 inline images - these are usually placeholders or tracking pixels
+				if tag_name == 'img' and attributes:
+					src = attributes.get('src', '')
+					if src.startswith('data:image/'):
+						continue
+
+				# Opening tag
+				output.append(f'<{tag_name}')
+
+				# Add attributes
+				if attributes:
+					attrs = self._serialize_attributes(attributes)
+					if attrs:
+						output.append(' ' + attrs)
+
+				# Handle void elements (self-closing)
+				if tag_name in VOID_ELEMENTS:
+					output.append(' />')
+					continue
+
+				output.append('>')
+
+				# Closing tag, emitted once all children below it on the stack are done
+				stack.append(f'</{tag_name}>')
+
+				# Handle iframe content document
+				if tag_name in FRAME_ELEMENTS and item.content_document:
+					# Serialize iframe content
+					stack.extend(reversed(item.content_document.children_nodes or []))
+				else:
+					# Light DOM children are pushed first so they pop after the shadow roots
+					stack.extend(reversed(item.children))
+
+					# Serialize shadow roots FIRST (for declarative shadow DOM)
+					if item.shadow_roots:
+						stack.extend(reversed(item.shadow_roots))
+
+			elif item.node_type == NodeType.TEXT_NODE:
+				# Return text content with basic HTML escaping
+				if item.node_value:
+					output.append(self._escape_html(item.node_value))
+
+			# Comments are skipped to reduce noise, as are unknown node types
+
+		return ''.join(output)
 
 	def _serialize_attributes(self, attributes: dict[str, str]) -> str:
 		"""Serialize element attributes to HTML attribute string.
@@ -1,5 +1,7 @@
 # @file purpose: Serializes enhanced DOM trees to string format for LLM consumption
 
+import logging
+import time
 from typing import Any
 
 from browser_use.dom.serializer.clickable_elements import ClickableElementDetector
@@ -15,27 +17,56 @@ from browser_use.dom.views import (
 	SimplifiedNode,
 )
 
-DISABLED_ELEMENTS = {'style', 'script', 'head', 'meta', 'link', 'title'}
+logger = logging.getLogger(__name__)
+
+DISABLED_ELEMENTS = frozenset({'style', 'script', 'head', 'meta', 'link', 'title'})
+
+# Attributes that should never be removed as duplicates (they serve distinct purposes)
+DEDUPE_PROTECTED_ATTRIBUTES = frozenset({'format', 'expected_format', 'placeholder', 'value', 'aria-label', 'title'})
+
+# Elements that may carry compound components, checked for every element while building the simplified tree
+COMPOUND_CONTROL_TAGS = frozenset({'input', 'select', 'details', 'audio', 'video'})
+
+# Input types that render as compound controls
+COMPOUND_INPUT_TYPES = frozenset(
+	{
+		'date',
+		'time',
+		'datetime-local',
+		'month',
+		'week',
+		'range',
+		'number',
+		'color',
+		'file',
+	}
+)
+
+# Bounding-box filtering never excludes these form elements or elements with these roles
+BBOX_KEEP_FORM_TAGS = frozenset({'input', 'select', 'textarea', 'label'})
+BBOX_KEEP_INTERACTIVE_ROLES = frozenset({'button', 'link', 'checkbox', 'radio', 'tab', 'menuitem', 'option'})
 
 # SVG child elements to skip (decorative only, no interaction value)
-SVG_ELEMENTS = {
-	'path',
-	'rect',
-	'g',
-	'circle',
-	'ellipse',
-	'line',
-	'polyline',
-	'polygon',
-	'use',
-	'defs',
-	'clipPath',
-	'mask',
-	'pattern',
-	'image',
-	'text',
-	'tspan',
-}
+SVG_ELEMENTS = frozenset(
+	{
+		'path',
+		'rect',
+		'g',
+		'circle',
+		'ellipse',
+		'line',
+		'polyline',
+		'polygon',
+		'use',
+		'defs',
+		'clipPath',
+		'mask',
+		'pattern',
+		'image',
+		'text',
+		'tspan',
+	}
+)
 
 
 class DOMTreeSerializer:
@@ -54,6 +85,9 @@ class DOMTreeSerializer:
 		# {'tag': 'div', 'role': 'link'},     # <div role="link">
 		# {'tag': 'span', 'role': 'link'},    # <span role="link">
 	]
+	# Lookup sets derived from PROPAGATING_ELEMENTS: tags that propagate with any role, and exact (tag, role) pairs
+	_PROPAGATING_TAGS_ANY_ROLE = frozenset(p['tag'] for p in PROPAGATING_ELEMENTS if p['role'] is None)
+	_PROPAGATING_TAG_ROLES = frozenset((p['tag'], p['role']) for p in PROPAGATING_ELEMENTS if p['role'] is not None)
 	DEFAULT_CONTAINMENT_THRESHOLD = 0.99  # 99% containment by default
 
 	def __init__(
@@ -72,6 +106,8 @@ class DOMTreeSerializer:
 		self.timing_info: dict[str, float] = {}
 		# Cache for clickable element detection to avoid redundant calls
 		self._clickable_cache: dict[int, bool] = {}
+		# Cache for interactive-descendant checks so nested scrollable containers don't re-walk shared subtrees
+		self._interactive_descendants_cache: dict[int, bool] = {}
 		# Bounding box filtering configuration
 		self.enable_bbox_filtering = enable_bbox_filtering
 		self.containment_threshold = containment_threshold or self.DEFAULT_CONTAINMENT_THRESHOLD
@@ -95,8 +131,6 @@ class DOMTreeSerializer:
 			return None
 
 	def serialize_accessible_elements(self) -> tuple[SerializedDOMState, dict[str, float]]:
-		import time
-
 		start_total = time.time()
 
 		# Reset state
@@ -104,6 +138,7 @@ class DOMTreeSerializer:
 		self._selector_map = {}
 		self._semantic_groups = []
 		self._clickable_cache = {}  # Clear cache for new serialization
+		self._interactive_descendants_cache = {}
 
 		# Step 1: Create simplified tree (includes clickable element detection)
 		start_step1 = time.time()
@@ -147,22 +182,12 @@ class DOMTreeSerializer:
 	def _add_compound_components(self, simplified: SimplifiedNode, node: EnhancedDOMTreeNode) -> None:
 		"""Enhance compound controls with information from their child components."""
 		# Only process elements that might have compound components
-		if node.tag_name not in ['input', 'select', 'details', 'audio', 'video']:
+		if node.tag_name not in COMPOUND_CONTROL_TAGS:
 			return
 
 		# For input elements, check for compound input types
 		if node.tag_name == 'input':
-			if not node.attributes or node.attributes.get('type') not in [
-				'date',
-				'time',
-				'datetime-local',
-				'month',
-				'week',
-				'range',
-				'number',
-				'color',
-				'file',
-			]:
+			if not node.attributes or node.attributes.get('type') not in COMPOUND_INPUT_TYPES:
 				return
 		# For other elements, check if they have AX child indicators
 		elif not node.ax_node or not node.ax_node.child_ids:
@@ -339,7 +364,7 @@ class DOMTreeSerializer:
 
 		def extract_options_recursive(node: EnhancedDOMTreeNode) -> None:
 			"""Recursively extract option elements, including from optgroups."""
-			if node.tag_name.lower() == 'option':
+			if node.tag_name == 'option':
 				# Extract option text and value
 				option_text = ''
 				option_value = ''
@@ -366,7 +391,7 @@ class DOMTreeSerializer:
 					options.append({'text': option_text, 'value': option_value})
 					option_values.append(option_value)
 
-			elif node.tag_name.lower() == 'optgroup':
+			elif node.tag_name == 'optgroup':
 				# Process optgroup children
 				for child in node.children:
 					extract_options_recursive(child)
@@ -413,21 +438,20 @@ class DOMTreeSerializer:
 
 	def _is_interactive_cached(self, node: EnhancedDOMTreeNode) -> bool:
 		"""Cached version of clickable element detection to avoid redundant calls."""
-
-		if node.node_id not in self._clickable_cache:
-			import time
-
+		# Single probe on the hit path instead of a membership test followed by a second lookup
+		result = self._clickable_cache.get(node.node_id)
+		if result is None:
 			start_time = time.time()
 			result = ClickableElementDetector.is_interactive(node)
 			end_time = time.time()
 
-			if 'clickable_detection_time' not in self.timing_info:
-				self.timing_info['clickable_detection_time'] = 0
-			self.timing_info['clickable_detection_time'] += end_time - start_time
+			self.timing_info['clickable_detection_time'] = (
+				self.timing_info.get('clickable_detection_time', 0) + end_time - start_time
+			)
 
 			self._clickable_cache[node.node_id] = result
 
-		return self._clickable_cache[node.node_id]
+		return result
 
 	def _create_simplified_tree(self, node: EnhancedDOMTreeNode, depth: int = 0) -> SimplifiedNode | None:
 		"""Step 1: Create a simplified tree with enhanced element detection."""
@@ -455,11 +479,11 @@ class DOMTreeSerializer:
 
 		elif node.node_type == NodeType.ELEMENT_NODE:
 			# Skip non-content elements
-			if node.node_name.lower() in DISABLED_ELEMENTS:
+			if node.tag_name in DISABLED_ELEMENTS:
 				return None
 
 			# Skip SVG child elements entirely (path, rect, g, circle, etc.)
-			if node.node_name.lower() in SVG_ELEMENTS:
+			if node.tag_name in SVG_ELEMENTS:
 				return None
 
 			if node.node_name == 'IFRAME' or node.node_name == 'FRAME':
@@ -473,10 +497,12 @@ class DOMTreeSerializer:
 
 			is_visible = node.is_visible
 			is_scrollable = node.is_actually_scrollable
-			has_shadow_content = bool(node.children_and_shadow_roots)
+			# The property builds a fresh merged list on every access, so fetch it once per element
+			children_and_shadow_roots = node.children_and_shadow_roots
+			has_shadow_content = bool(children_and_shadow_roots)
 
 			# ENHANCED SHADOW DOM DETECTION: Include shadow hosts even if not visible
-			is_shadow_host = any(child.node_type == NodeType.DOCUMENT_FRAGMENT_NODE for child in node.children_and_shadow_roots)
+			is_shadow_host = any(child.node_type == NodeType.DOCUMENT_FRAGMENT_NODE for child in children_and_shadow_roots)
 
 			# Override visibility for elements with validation attributes
 			if not is_visible and node.attributes:
@@ -486,9 +512,7 @@ class DOMTreeSerializer:
 
 			# EXCEPTION: File inputs are often hidden with opacity:0 but are still functional
 			# Bootstrap and other frameworks use this pattern with custom-styled file pickers
-			is_file_input = (
-				node.tag_name and node.tag_name.lower() == 'input' and node.attributes and node.attributes.get('type') == 'file'
-			)
+			is_file_input = node.tag_name == 'input' and node.attributes and node.attributes.get('type') == 'file'
 			if not is_visible and is_file_input:
 				is_visible = True  # Force visibility for file inputs
 
@@ -497,7 +521,7 @@ class DOMTreeSerializer:
 				simplified = SimplifiedNode(original_node=node, children=[], is_shadow_host=is_shadow_host)
 
 				# Process ALL children including shadow roots with enhanced logging
-				for child in node.children_and_shadow_roots:
+				for child in children_and_shadow_roots:
 					simplified_child = self._create_simplified_tree(child, depth + 1)
 					if simplified_child:
 						simplified.children.append(simplified_child)
@@ -526,36 +550,40 @@ class DOMTreeSerializer:
 		if not node:
 			return None
 
-		# Process children
-		optimized_children = []
-		for child in node.children:
-			optimized_child = self._optimize_tree(child)
-			if optimized_child:
-				optimized_children.append(optimized_child)
+		# Post-order without recursion: collect nodes parent-first, then settle them in reverse so
+		# every node's children are decided before the node itself
+		nodes: list[SimplifiedNode] = []
+		stack = [node]
+		while stack:
+			current = stack.pop()
+			nodes.append(current)
+			stack.extend(current.children)
 
-		node.children = optimized_children
+		kept: set[int] = set()
+		for current in reversed(nodes):
+			# Process children
+			current.children = [child for child in current.children if id(child) in kept]
 
-		# Keep meaningful nodes
-		is_visible = node.original_node.snapshot_node and node.original_node.is_visible
+			# Keep meaningful nodes
+			is_visible = current.original_node.snapshot_node and current.original_node.is_visible
 
-		# EXCEPTION: File inputs are often hidden with opacity:0 but are still functional
-		is_file_input = (
-			node.original_node.tag_name
-			and node.original_node.tag_name.lower() == 'input'
-			and node.original_node.attributes
-			and node.original_node.attributes.get('type') == 'file'
-		)
+			# EXCEPTION: File inputs are often hidden with opacity:0 but are still functional
+			is_file_input = (
+				current.original_node.tag_name == 'input'
+				and current.original_node.attributes
+				and current.original_node.attributes.get('type') == 'file'
+			)
 
-		if (
-			is_visible  # Keep all visible nodes
-			or node.original_node.is_actually_scrollable
-			or node.original_node.node_type == NodeType.TEXT_NODE
-			or node.children
-			or is_file_input  # Keep file inputs even if not visible
-		):
-			return node
+			if (
+				is_visible  # Keep all visible nodes
+				or current.original_node.is_actually_scrollable
+				or current.original_node.node_type == NodeType.TEXT_NODE
+				or current.children
+				or is_file_input  # Keep file inputs even if not visible
+			):
+				kept.add(id(current))
 
-		return None
+		return node if id(node) in kept else None
 
 	def _collect_interactive_elements(self, node: SimplifiedNode, elements: list[SimplifiedNode]) -> None:
 		"""Recursively collect interactive elements that are also visible."""
@@ -571,72 +599,88 @@ class DOMTreeSerializer:
 
 	def _has_interactive_descendants(self, node: SimplifiedNode) -> bool:
 		"""Check if a node has any interactive descendants (not including the node itself)."""
+		# Memoized per node: each scrollable container asks this, and without the cache every
+		# nested scrollable re-walked the subtrees its ancestors had already checked (quadratic).
+		# Keyed by object identity - CDP node ids are per target, so merged iframe trees can repeat them
+		cached = self._interactive_descendants_cache.get(id(node))
+		if cached is not None:
+			return cached
+
+		result = False
 		# Check children for interactivity
 		for child in node.children:
-			# Check if child itself is interactive
-			if self._is_interactive_cached(child.original_node):
-				return True
-			# Recursively check child's descendants
-			if self._has_interactive_descendants(child):
-				return True
+			# Check if child itself is interactive, then recursively check child's descendants
+			if self._is_interactive_cached(child.original_node) or self._has_interactive_descendants(child):
+				result = True
+				break
 
-		return False
+		self._interactive_descendants_cache[id(node)] = result
+		return result
 
 	def _assign_interactive_indices_and_mark_new_nodes(self, node: SimplifiedNode | None) -> None:
 		"""Assign interactive indices to clickable elements that are also visible."""
 		if not node:
 			return
 
-		# Skip assigning index to excluded nodes, or ignored by paint order
-		if not node.excluded_by_parent and not node.ignored_by_paint_order:
-			# Regular interactive element assignment (including enhanced compound controls)
-			is_interactive_assign = self._is_interactive_cached(node.original_node)
-			is_visible = node.original_node.snapshot_node and node.original_node.is_visible
-			is_scrollable = node.original_node.is_actually_scrollable
-
-			# EXCEPTION: File inputs are often hidden with opacity:0 but are still functional
-			# Bootstrap and other frameworks use this pattern with custom-styled file pickers
-			is_file_input = (
-				node.original_node.tag_name
-				and node.original_node.tag_name.lower() == 'input'
-				and node.original_node.attributes
-				and node.original_node.attributes.get('type') == 'file'
-			)
+		# Backend ids from the previous state, built once per pass rather than for every interactive node
+		previous_backend_node_ids = (
+			{cached.backend_node_id for cached in self._previous_cached_selector_map.values()}
+			if self._previous_cached_selector_map
+			else None
+		)
 
-			# Check if scrollable container should be made interactive
-			# For scrollable elements, ONLY make them interactive if they have no interactive descendants
-			should_make_interactive = False
-			if is_scrollable:
-				# For scrollable elements, check if they have interactive children
-				has_interactive_desc = self._has_interactive_descendants(node)
+		# Pre-order walk with an explicit stack so indices are assigned in document order without recursion
+		stack = [node]
+		while stack:
+			node = stack.pop()
+
+			# Skip assigning index to excluded nodes, or ignored by paint order
+			if not node.excluded_by_parent and not node.ignored_by_paint_order:
+				# Regular interactive element assignment (including enhanced compound controls)
+				is_interactive_assign = self._is_interactive_cached(node.original_node)
+				is_visible = node.original_node.snapshot_node and node.original_node.is_visible
+				is_scrollable = node.original_node.is_actually_scrollable
+
+				# EXCEPTION: File inputs are often hidden with opacity:0 but are still functional
+				# Bootstrap and other frameworks use this pattern with custom-styled file pickers
+				is_file_input = (
+					node.original_node.tag_name == 'input'
+					and node.original_node.attributes
+					and node.original_node.attributes.get('type') == 'file'
+				)
 
-				# Only make scrollable container interactive if it has NO interactive descendants
-				if not has_interactive_desc:
+				# Check if scrollable container should be made interactive
+				# For scrollable elements, ONLY make them interactive if they have no interactive descendants
+				should_make_interactive = False
+				if is_scrollable:
+					# For scrollable elements, check if they have interactive children
+					has_interactive_desc = self._has_interactive_descendants(node)
+
+					# Only make scrollable container interactive if it has NO interactive descendants
+					if not has_interactive_desc:
+						should_make_interactive = True
+				elif is_interactive_assign and (is_visible or is_file_input):
+					# Non-scrollable interactive elements: make interactive if visible (or file input)
 					should_make_interactive = True
-			elif is_interactive_assign and (is_visible or is_file_input):
-				# Non-scrollable interactive elements: make interactive if visible (or file input)
-				should_make_interactive = True
-
-			# Add to selector map if element should be interactive
-			if should_make_interactive:
-				# Mark node as interactive
-				node.is_interactive = True
-				# Store backend_node_id in selector map (model outputs backend_node_id)
-				self._selector_map[node.original_node.backend_node_id] = node.original_node
-				self._interactive_counter += 1
-
-				# Mark compound components as new for visibility
-				if node.is_compound_component:
-					node.is_new = True
-				elif self._previous_cached_selector_map:
-					# Check if node is new for regular elements
-					previous_backend_node_ids = {node.backend_node_id for node in self._previous_cached_selector_map.values()}
-					if node.original_node.backend_node_id not in previous_backend_node_ids:
+
+				# Add to selector map if element should be interactive
+				if should_make_interactive:
+					# Mark node as interactive
+					node.is_interactive = True
+					# Store backend_node_id in selector map (model outputs backend_node_id)
+					self._selector_map[node.original_node.backend_node_id] = node.original_node
+					self._interactive_counter += 1
+
+					# Mark compound components as new for visibility
+					if node.is_compound_component:
 						node.is_new = True
+					elif previous_backend_node_ids is not None:
+						# Check if node is new for regular elements
+						if node.original_node.backend_node_id not in previous_backend_node_ids:
+							node.is_new = True
 
-		# Process children
-		for child in node.children:
-			self._assign_interactive_indices_and_mark_new_nodes(child)
+			# Process children
+			stack.extend(reversed(node.children))
 
 	def _apply_bounding_box_filtering(self, node: SimplifiedNode | None) -> SimplifiedNode | None:
 		"""Filter children contained within propagating parent bounds."""
@@ -644,110 +688,107 @@ class DOMTreeSerializer:
 			return None
 
 		# Start with no active bounds
-		self._filter_tree_recursive(node, active_bounds=None, depth=0)
+		self._filter_tree(node)
 
-		# Log statistics
-		excluded_count = self._count_excluded_nodes(node)
-		if excluded_count > 0:
-			import logging
-
-			logging.debug(f'BBox filtering excluded {excluded_count} nodes')
+		# Log statistics - counting needs a full extra walk, so only do it when the message would be emitted
+		if logger.isEnabledFor(logging.DEBUG):
+			excluded_count = self._count_excluded_nodes(node)
+			if excluded_count > 0:
+				logger.debug(f'BBox filtering excluded {excluded_count} nodes')
 
 		return node
 
-	def _filter_tree_recursive(self, node: SimplifiedNode, active_bounds: PropagatingBounds | None = None, depth: int = 0):
+	def _filter_tree(self, root: SimplifiedNode) -> None:
 		"""
-		Recursively filter tree with bounding box propagation.
+		Filter tree with bounding box propagation.
 		Bounds propagate to ALL descendants until overridden.
 		"""
+		# Explicit stack of (node, active bounds, depth) instead of one recursive call per node
+		stack: list[tuple[SimplifiedNode, PropagatingBounds | None, int]] = [(root, None, 0)]
+		while stack:
+			node, active_bounds, depth = stack.pop()
+
+			# Without active bounds a leaf can neither be excluded nor pass new bounds to anyone
+			if active_bounds is None and not node.children:
+				continue
+
+			# Tag and role are read once here and shared with the exclusion check below
+			tag = node.original_node.tag_name
+			role = node.original_node.attributes.get('role') if node.original_node.attributes else None
+
+			# Check if this node should be excluded by active bounds
+			if active_bounds and self._should_exclude_child(node, active_bounds, tag, role):
+				node.excluded_by_parent = True
+				# Important: Still check if this node starts NEW propagation
+
+			# Check if this node starts new propagation (even if excluded!)
+			new_bounds = None
+			# Check if this element matches any propagating element pattern
+			if self._is_propagating_element(tag, role):
+				# This node propagates bounds to ALL its descendants
+				if node.original_node.snapshot_node and node.original_node.snapshot_node.bounds:
+					new_bounds = PropagatingBounds(
+						tag=tag,
+						bounds=node.original_node.snapshot_node.bounds,
+						node_id=node.original_node.node_id,
+						depth=depth,
+					)
 
-		# Check if this node should be excluded by active bounds
-		if active_bounds and self._should_exclude_child(node, active_bounds):
-			node.excluded_by_parent = True
-			# Important: Still check if this node starts NEW propagation
-
-		# Check if this node starts new propagation (even if excluded!)
-		new_bounds = None
-		tag = node.original_node.tag_name.lower()
-		role = node.original_node.attributes.get('role') if node.original_node.attributes else None
-		attributes = {
-			'tag': tag,
-			'role': role,
-		}
-		# Check if this element matches any propagating element pattern
-		if self._is_propagating_element(attributes):
-			# This node propagates bounds to ALL its descendants
-			if node.original_node.snapshot_node and node.original_node.snapshot_node.bounds:
-				new_bounds = PropagatingBounds(
-					tag=tag,
-					bounds=node.original_node.snapshot_node.bounds,
-					node_id=node.original_node.node_id,
-					depth=depth,
-				)
-
-		# Propagate to ALL children
-		# Use new_bounds if this node starts propagation, otherwise continue with active_bounds
-		propagate_bounds = new_bounds if new_bounds else active_bounds
+			# Propagate to ALL children
+			# Use new_bounds if this node starts propagation, otherwise continue with active_bounds
+			propagate_bounds = new_bounds if new_bounds else active_bounds
 
-		for child in node.children:
-			self._filter_tree_recursive(child, propagate_bounds, depth + 1)
+			stack.extend((child, propagate_bounds, depth + 1) for child in reversed(node.children))
 
-	def _should_exclude_child(self, node: SimplifiedNode, active_bounds: PropagatingBounds) -> bool:
+	def _should_exclude_child(
+		self, node: SimplifiedNode, active_bounds: PropagatingBounds, child_tag: str, child_role: str | None
+	) -> bool:
 		"""
 		Determine if child should be excluded based on propagating bounds.
+		`child_tag` and `child_role` are the node's tag name and role attribute, already read by the caller.
 		"""
 
+		original_node = node.original_node
+
 		# Never exclude text nodes - we always want to preserve text content
-		if node.original_node.node_type == NodeType.TEXT_NODE:
+		if original_node.node_type == NodeType.TEXT_NODE:
 			return False
 
-		# Get child bounds
-		if not node.original_node.snapshot_node or not node.original_node.snapshot_node.bounds:
-			return False  # No bounds = can't determine containment
-
-		child_bounds = node.original_node.snapshot_node.bounds
-
-		# Check containment with configured threshold
-		if not self._is_contained(child_bounds, active_bounds.bounds, self.containment_threshold):
-			return False  # Not sufficiently contained
-
-		# EXCEPTION RULES - Keep these even if contained:
-
-		child_tag = node.original_node.tag_name.lower()
-		child_role = node.original_node.attributes.get('role') if node.original_node.attributes else None
-		child_attributes = {
-			'tag': child_tag,
-			'role': child_role,
-		}
+		# EXCEPTION RULES - Keep these even if contained. Every rule only ever keeps the child, so
+		# the cheap tag/role/attribute rules run before the containment math
 
 		# 1. Never exclude form elements (they need individual interaction)
-		if child_tag in ['input', 'select', 'textarea', 'label']:
+		if child_tag in BBOX_KEEP_FORM_TAGS:
 			return False
 
-		# 2. Keep if child is also a propagating element
-		# (might have stopPropagation, e.g., button in button)
-		if self._is_propagating_element(child_attributes):
+		# 2. Keep if has role suggesting interactivity
+		if child_role in BBOX_KEEP_INTERACTIVE_ROLES:
 			return False
 
-		# 3. Keep if has explicit onclick handler
-		if node.original_node.attributes and 'onclick' in node.original_node.attributes:
+		# 3. Keep if child is also a propagating element
+		# (might have stopPropagation, e.g., button in button)
+		if self._is_propagating_element(child_tag, child_role):
 			return False
 
-		# 4. Keep if has aria-label suggesting it's independently interactive
-		if node.original_node.attributes:
-			aria_label = node.original_node.attributes.get('aria-label')
+		attributes = original_node.attributes
+		if attributes:
+			# 4. Keep if has explicit onclick handler
+			if 'onclick' in attributes:
+				return False
+
+			# 5. Keep if has aria-label suggesting it's independently interactive
+			aria_label = attributes.get('aria-label')
 			if aria_label and aria_label.strip():
 				# Has meaningful aria-label, likely interactive
 				return False
 
-		# 5. Keep if has role suggesting interactivity
-		if node.original_node.attributes:
-			role = node.original_node.attributes.get('role')
-			if role in ['button', 'link', 'checkbox', 'radio', 'tab', 'menuitem', 'option']:
-				return False
+		# Get child bounds
+		snapshot_node = original_node.snapshot_node
+		if not snapshot_node or not snapshot_node.bounds:
+			return False  # No bounds = can't determine containment
 
-		# Default: exclude this child
-		return True
+		# Check containment with configured threshold; exclude the child only if it is sufficiently contained
+		return self._is_contained(snapshot_node.bounds, active_bounds.bounds, self.containment_threshold)
 
 	def _is_contained(self, child: DOMRect, parent: DOMRect, threshold: float) -> bool:
 		"""
@@ -756,40 +797,36 @@ class DOMTreeSerializer:
 		Args:
 			threshold: Percentage (0.0-1.0) of child that must be within parent
 		"""
+		# Zero-area elements are rejected before any overlap math
+		child_area = child.width * child.height
+		if child_area == 0:
+			return False  # Zero-area element
+
 		# Calculate intersection
 		x_overlap = max(0, min(child.x + child.width, parent.x + parent.width) - max(child.x, parent.x))
-		y_overlap = max(0, min(child.y + child.height, parent.y + parent.height) - max(child.y, parent.y))
+		if x_overlap == 0:
+			return False  # No horizontal overlap, so nothing of the child is inside the parent
 
+		y_overlap = max(0, min(child.y + child.height, parent.y + parent.height) - max(child.y, parent.y))
 		intersection_area = x_overlap * y_overlap
-		child_area = child.width * child.height
-
-		if child_area == 0:
-			return False  # Zero-area element
 
 		containment_ratio = intersection_area / child_area
 		return containment_ratio >= threshold
 
 	def _count_excluded_nodes(self, node: SimplifiedNode, count: int = 0) -> int:
 		"""Count how many nodes were excluded (for debugging)."""
-		if hasattr(node, 'excluded_by_parent') and node.excluded_by_parent:
+		if node.excluded_by_parent:
 			count += 1
 		for child in node.children:
 			count = self._count_excluded_nodes(child, count)
 		return count
 
-	def _is_propagating_element(self, attributes: dict[str, str | None]) -> bool:
+	def _is_propagating_element(self, tag: str, role: str | None) -> bool:
 		"""
-		Check if an element should propagate bounds based on attributes.
+		Check if an element should propagate bounds based on its tag and role.
 		If the element satisfies one of the patterns, it propagates bounds to all its children.
 		"""
-		keys_to_check = ['tag', 'role']
-		for pattern in self.PROPAGATING_ELEMENTS:
-			# Check if the element satisfies the pattern
-			check = [pattern.get(key) is None or pattern.get(key) == attributes.get(key) for key in keys_to_check]
-			if all(check):
-				return True
-
-		return False
+		return tag in self._PROPAGATING_TAGS_ANY_ROLE or (tag, role) in self._PROPAGATING_TAG_ROLES
 
 	@staticmethod
 	def serialize_tree(node: SimplifiedNode | None, include_attributes: list[str], depth: int = 0) -> str:
@@ -797,202 +834,216 @@ class DOMTreeSerializer:
 		if not node:
 			return ''
 
-		# Skip rendering excluded nodes, but process their children
-		if hasattr(node, 'excluded_by_parent') and node.excluded_by_parent:
-			formatted_text = []
-			for child in node.children:
-				child_text = DOMTreeSerializer.serialize_tree(child, include_attributes, depth)
-				if child_text:
-					formatted_text.append(child_text)
-			return '\n'.join(formatted_text)
-
-		formatted_text = []
-		depth_str = depth * '\t'
-		next_depth = depth
-
-		if node.original_node.node_type == NodeType.ELEMENT_NODE:
-			# Skip displaying nodes marked as should_display=False
-			if not node.should_display:
-				for child in node.children:
-					child_text = DOMTreeSerializer.serialize_tree(child, include_attributes, depth)
-					if child_text:
-						formatted_text.append(child_text)
-				return '\n'.join(formatted_text)
-
-			# Special handling for SVG elements - show the tag but collapse children
-			if node.original_node.tag_name.lower() == 'svg':
-				shadow_prefix = ''
-				if node.is_shadow_host:
-					has_closed_shadow = any(
-						child.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE
-						and child.original_node.shadow_root_type
-						and child.original_node.shadow_root_type.lower() == 'closed'
-						for child in node.children
-					)
-					shadow_prefix = '|SHADOW(closed)|' if has_closed_shadow else '|SHADOW(open)|'
-
-				line = f'{depth_str}{shadow_prefix}'
-				# Add interactive marker if clickable
-				if node.is_interactive:
-					new_prefix = '*' if node.is_new else ''
-					line += f'{new_prefix}[{node.original_node.backend_node_id}]'
-				line += '<svg'
-				attributes_html_str = DOMTreeSerializer._build_attributes_string(node.original_node, include_attributes, '')
-				if attributes_html_str:
-					line += f' {attributes_html_str}'
-				line += ' /> <!-- SVG content collapsed -->'
-				formatted_text.append(line)
-				# Don't process children for SVG
-				return '\n'.join(formatted_text)
-
-			# Add element if clickable, scrollable, or iframe
-			is_any_scrollable = node.original_node.is_actually_scrollable or node.original_node.is_scrollable
-			should_show_scroll = node.original_node.should_show_scroll_info
-			if (
-				node.is_interactive
-				or is_any_scrollable
-				or node.original_node.tag_name.upper() == 'IFRAME'
-				or node.original_node.tag_name.upper() == 'FRAME'
-			):
-				next_depth += 1
+		# All lines are appended to one shared list and joined once, instead of joining at every level
+		output: list[str] = []
+		# Membership set for the attribute filters, built once per call instead of scanning the list per attribute
+		include_attributes_set = frozenset(include_attributes)
+		DOMTreeSerializer._serialize_tree_into(node, output, include_attributes, include_attributes_set, depth)
+		return '\n'.join(output)
 
-				# Build attributes string with compound component info
-				text_content = ''
-				attributes_html_str = DOMTreeSerializer._build_attributes_string(
-					node.original_node, include_attributes, text_content
-				)
+	@staticmethod
+	def _serialize_tree_into(
+		node: SimplifiedNode,
+		output: list[str],
+		include_attributes: list[str],
+		include_attributes_set: frozenset[str],
+		depth: int,
+	) -> None:
+		"""Append the serialized lines for a node and its subtree to `output`."""
+		# Iterative depth-first walk over an explicit stack, so deeply nested pages can't hit the recursion limit.
+		# Entries are either a node to visit with its depth, or a ready-made line (shadow DOM end markers).
+		# Children are pushed in reverse so they pop in document order.
+		stack: list[tuple[SimplifiedNode, int] | str] = [(node, depth)]
+		while stack:
+			item = stack.pop()
+			if isinstance(item, str):
+				output.append(item)
+				continue
+			node, depth = item
+
+			# Skip rendering excluded nodes, but process their children
+			if node.excluded_by_parent:
+				stack.extend((child, depth) for child in reversed(node.children))
+				continue
+
+			depth_str = depth * '\t'
+			next_depth = depth
+
+			if node.original_node.node_type == NodeType.ELEMENT_NODE:
+				# Skip displaying nodes marked as should_display=False
+				if not node.should_display:
+					stack.extend((child, depth) for child in reversed(node.children))
+					continue
 
-				# Add compound component information to attributes if present
-				if node.original_node._compound_children:
-					compound_info = []
-					for child_info in node.original_node._compound_children:
-						parts = []
-						if child_info['name']:
-							parts.append(f'name={child_info["name"]}')
-						if child_info['role']:
-							parts.append(f'role={child_info["role"]}')
-						if child_info['valuemin'] is not None:
-							parts.append(f'min={child_info["valuemin"]}')
-						if child_info['valuemax'] is not None:
-							parts.append(f'max={child_info["valuemax"]}')
-						if child_info['valuenow'] is not None:
-							parts.append(f'current={child_info["valuenow"]}')
-
-						# Add select-specific information
-						if 'options_count' in child_info and child_info['options_count'] is not None:
-							parts.append(f'count={child_info["options_count"]}')
-						if 'first_options' in child_info and child_info['first_options']:
-							options_str = '|'.join(child_info['first_options'][:4])  # Limit to 4 options
-							parts.append(f'options={options_str}')
-						if 'format_hint' in child_info and child_info['format_hint']:
-							parts.append(f'format={child_info["format_hint"]}')
-
-						if parts:
-							compound_info.append(f'({",".join(parts)})')
-
-					if compound_info:
-						compound_attr = f'compound_components={",".join(compound_info)}'
-						if attributes_html_str:
-							attributes_html_str += f' {compound_attr}'
-						else:
-							attributes_html_str = compound_attr
-
-				# Build the line with shadow host indicator
-				shadow_prefix = ''
-				if node.is_shadow_host:
-					# Check if any shadow children are closed
-					has_closed_shadow = any(
-						child.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE
-						and child.original_node.shadow_root_type
-						and child.original_node.shadow_root_type.lower() == 'closed'
-						for child in node.children
+				# Special handling for SVG elements - show the tag but collapse children
+				if node.original_node.tag_name == 'svg':
+					shadow_prefix = ''
+					if node.is_shadow_host:
+						has_closed_shadow = any(
+							child.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE
+							and child.original_node.shadow_root_type
+							and child.original_node.shadow_root_type.lower() == 'closed'
+							for child in node.children
+						)
+						shadow_prefix = '|SHADOW(closed)|' if has_closed_shadow else '|SHADOW(open)|'
+
+					line = f'{depth_str}{shadow_prefix}'
+					# Add interactive marker if clickable
+					if node.is_interactive:
+						new_prefix = '*' if node.is_new else ''
+						line += f'{new_prefix}[{node.original_node.backend_node_id}]'
+					line += '<svg'
+					attributes_html_str = DOMTreeSerializer._build_attributes_string(
+						node.original_node, include_attributes, '', include_attributes_set
 					)
-					shadow_prefix = '|SHADOW(closed)|' if has_closed_shadow else '|SHADOW(open)|'
-
-				if should_show_scroll and not node.is_interactive:
-					# Scrollable container but not clickable
-					line = f'{depth_str}{shadow_prefix}|SCROLL|<{node.original_node.tag_name}'
-				elif node.is_interactive:
-					# Clickable (and possibly scrollable) - show backend_node_id
-					new_prefix = '*' if node.is_new else ''
-					scroll_prefix = '|SCROLL[' if should_show_scroll else '['
-					line = f'{depth_str}{shadow_prefix}{new_prefix}{scroll_prefix}{node.original_node.backend_node_id}]<{node.original_node.tag_name}'
-				elif node.original_node.tag_name.upper() == 'IFRAME':
-					# Iframe element (not interactive)
-					line = f'{depth_str}{shadow_prefix}|IFRAME|<{node.original_node.tag_name}'
-				elif node.original_node.tag_name.upper() == 'FRAME':
-					# Frame element (not interactive)
-					line = f'{depth_str}{shadow_prefix}|FRAME|<{node.original_node.tag_name}'
-				else:
-					line = f'{depth_str}{shadow_prefix}<{node.original_node.tag_name}'
+					if attributes_html_str:
+						line += f' {attributes_html_str}'
+					line += ' /> <!-- SVG content collapsed -->'
+					output.append(line)
+					# Don't process children for SVG
+					continue
 
-				if attributes_html_str:
-					line += f' {attributes_html_str}'
+				# Add element if clickable, scrollable, or iframe
+				is_any_scrollable = node.original_node.is_actually_scrollable or node.original_node.is_scrollable
+				should_show_scroll = node.original_node.should_show_scroll_info
+				if (
+					node.is_interactive
+					or is_any_scrollable
+					or node.original_node.tag_name == 'iframe'
+					or node.original_node.tag_name == 'frame'
+				):
+					next_depth += 1
+
+					# Build attributes string with compound component info
+					text_content = ''
+					attributes_html_str = DOMTreeSerializer._build_attributes_string(
+						node.original_node, include_attributes, text_content, include_attributes_set
+					)
 
-				line += ' />'
+					# Add compound component information to attributes if present
+					if node.original_node._compound_children:
+						compound_info = []
+						for child_info in node.original_node._compound_children:
+							parts = []
+							if child_info['name']:
+								parts.append(f'name={child_info["name"]}')
+							if child_info['role']:
+								parts.append(f'role={child_info["role"]}')
+							if child_info['valuemin'] is not None:
+								parts.append(f'min={child_info["valuemin"]}')
+							if child_info['valuemax'] is not None:
+								parts.append(f'max={child_info["valuemax"]}')
+							if child_info['valuenow'] is not None:
+								parts.append(f'current={child_info["valuenow"]}')
+
+							# Add select-specific information
+							if 'options_count' in child_info and child_info['options_count'] is not None:
+								parts.append(f'count={child_info["options_count"]}')
+							if 'first_options' in child_info and child_info['first_options']:
+								options_str = '|'.join(child_info['first_options'][:4])  # Limit to 4 options
+								parts.append(f'options={options_str}')
+							if 'format_hint' in child_info and child_info['format_hint']:
+								parts.append(f'format={child_info["format_hint"]}')
+
+							if parts:
+								compound_info.append(f'({",".join(parts)})')
+
+						if compound_info:
+							compound_attr = f'compound_components={",".join(compound_info)}'
+							if attributes_html_str:
+								attributes_html_str += f' {compound_attr}'
+							else:
+								attributes_html_str = compound_attr
+
+					# Build the line with shadow host indicator
+					shadow_prefix = ''
+					if node.is_shadow_host:
+						# Check if any shadow children are closed
+						has_closed_shadow = any(
+							child.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE
+							and child.original_node.shadow_root_type
+							and child.original_node.shadow_root_type.lower() == 'closed'
+							for child in node.children
+						)
+						shadow_prefix = '|SHADOW(closed)|' if has_closed_shadow else '|SHADOW(open)|'
+
+					if should_show_scroll and not node.is_interactive:
+						# Scrollable container but not clickable
+						line = f'{depth_str}{shadow_prefix}|SCROLL|<{node.original_node.tag_name}'
+					elif node.is_interactive:
+						# Clickable (and possibly scrollable) - show backend_node_id
+						new_prefix = '*' if node.is_new else ''
+						scroll_prefix = '|SCROLL[' if should_show_scroll else '['
+						line = f'{depth_str}{shadow_prefix}{new_prefix}{scroll_prefix}{node.original_node.backend_node_id}]<{node.original_node.tag_name}'
+					elif node.original_node.tag_name == 'iframe':
+						# Iframe element (not interactive)
+						line = f'{depth_str}{shadow_prefix}|IFRAME|<{node.original_node.tag_name}'
+					elif node.original_node.tag_name == 'frame':
+						# Frame element (not interactive)
+						line = f'{depth_str}{shadow_prefix}|FRAME|<{node.original_node.tag_name}'
+					else:
+						line = f'{depth_str}{shadow_prefix}<{node.original_node.tag_name}'
 
-				# Add scroll information only when we should show it
-				if should_show_scroll:
-					scroll_info_text = node.original_node.get_scroll_info_text()
-					if scroll_info_text:
-						line += f' ({scroll_info_text})'
+					if attributes_html_str:
+						line += f' {attributes_html_str}'
 
-				formatted_text.append(line)
+					line += ' />'
 
-		elif node.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
-			# Shadow DOM representation - show clearly to LLM
-			if node.original_node.shadow_root_type and node.original_node.shadow_root_type.lower() == 'closed':
-				formatted_text.append(f'{depth_str}Closed Shadow')
-			else:
-				formatted_text.append(f'{depth_str}Open Shadow')
+					# Add scroll information only when we should show it
+					if should_show_scroll:
+						scroll_info_text = node.original_node.get_scroll_info_text()
+						if scroll_info_text:
+							line += f' ({scroll_info_text})'
 
-			next_depth += 1
+					output.append(line)
 
-			# Process shadow DOM children
-			for child in node.children:
-				child_text = DOMTreeSerializer.serialize_tree(child, include_attributes, next_depth)
-				if child_text:
-					formatted_text.append(child_text)
+			elif node.original_node.node_type == NodeType.DOCUMENT_FRAGMENT_NODE:
+				# Shadow DOM representation - show clearly to LLM
+				if node.original_node.shadow_root_type and node.original_node.shadow_root_type.lower() == 'closed':
+					output.append(f'{depth_str}Closed Shadow')
+				else:
+					output.append(f'{depth_str}Open Shadow')
 
-			# Close shadow DOM indicator
-			if node.children:  # Only show close if we had content
-				formatted_text.append(f'{depth_str}Shadow End')
+				next_depth += 1
 
-		elif node.original_node.node_type == NodeType.TEXT_NODE:
-			# Include visible text
-			is_visible = node.original_node.snapshot_node and node.original_node.is_visible
-			if (
-				is_visible
-				and node.original_node.node_value
-				and node.original_node.node_value.strip()
-				and len(node.original_node.node_value.strip()) > 1
-			):
-				clean_text = node.original_node.node_value.strip()
-				formatted_text.append(f'{depth_str}{clean_text}')
+				# Process shadow DOM children, then close the shadow DOM indicator (only if we had content)
+				if node.children:
+					stack.append(f'{depth_str}Shadow End')
+					stack.extend((child, next_depth) for child in reversed(node.children))
 
-		# Process children (for non-shadow elements)
-		if node.original_node.node_type != NodeType.DOCUMENT_FRAGMENT_NODE:
-			for child in node.children:
-				child_text = DOMTreeSerializer.serialize_tree(child, include_attributes, next_depth)
-				if child_text:
-					formatted_text.append(child_text)
+			elif node.original_node.node_type == NodeType.TEXT_NODE:
+				# Include visible text - the value is stripped once and reused for the length check and the output
+				original_node = node.original_node
+				node_value = original_node.node_value
+				if node_value and original_node.snapshot_node and original_node.is_visible:
+					clean_text = node_value.strip()
+					if len(clean_text) > 1:
+						output.append(f'{depth_str}{clean_text}')
 
-		return '\n'.join(formatted_text)
+			# Process children (for non-shadow elements)
+			if node.original_node.node_type != NodeType.DOCUMENT_FRAGMENT_NODE:
+				stack.extend((child, next_depth) for child in reversed(node.children))
 
 	@staticmethod
-	def _build_attributes_string(node: EnhancedDOMTreeNode, include_attributes: list[str], text: str) -> str:
+	def _build_attributes_string(
+		node: EnhancedDOMTreeNode,
+		include_attributes: list[str],
+		text: str,
+		include_attributes_set: frozenset[str] | None = None,
+	) -> str:
 		"""Build the attributes string for an element."""
+		if include_attributes_set is None:
+			include_attributes_set = frozenset(include_attributes)
 		attributes_to_include = {}
 
 		# Include HTML attributes
 		if node.attributes:
-			attributes_to_include.update(
-				{
-					key: str(value).strip()
-					for key, value in node.attributes.items()
-					if key in include_attributes and str(value).strip() != ''
-				}
-			)
+			for key, value in node.attributes.items():
+				if key in include_attributes_set:
+					# Attribute values are almost always str already - skip the str() copy
+					value = value.strip() if isinstance(value, str) else str(value).strip()
+					if value:
+						attributes_to_include[key] = value
 
 		# Add format hints for date/time inputs to help LLMs use the correct format
 		# NOTE: These formats are standardized by HTML5 specification (ISO 8601), NOT locale-dependent
@@ -1002,7 +1053,7 @@ class DOMTreeSerializer:
 		# - time: HH:MM or HH:MM:SS (24-hour, e.g., "14:30")
 		# - datetime-local: YYYY-MM-DDTHH:MM (e.g., "2024-03-15T14:30")
 		# Reference: https://developer.mozilla.org/en-US/docs/Web/HTML/Element/input/date
-		if node.tag_name and node.tag_name.lower() == 'input' and node.attributes:
+		if node.tag_name == 'input' and node.attributes:
 			input_type = node.attributes.get('type', '').lower()
 
 			# For HTML5 date/time inputs, add a highly visible "format" attribute
@@ -1020,7 +1071,7 @@ class DOMTreeSerializer:
 				attributes_to_include['format'] = format_map[input_type]
 
 			# Only add placeholder if it doesn't already exist
-			if 'placeholder' in include_attributes and 'placeholder' not in attributes_to_include:
+			if 'placeholder' in include_attributes_set and 'placeholder' not in attributes_to_include:
 				# Native HTML5 date/time inputs - ISO format required
 				if input_type == 'date':
 					attributes_to_include['placeholder'] = 'YYYY-MM-DD'
@@ -1074,7 +1125,7 @@ class DOMTreeSerializer:
 		if node.ax_node and node.ax_node.properties:
 			for prop in node.ax_node.properties:
 				try:
-					if prop.name in include_attributes and prop.value is not None:
+					if prop.value is not None and prop.name in include_attributes_set:
 						# Convert boolean to lowercase string, keep others as-is
 						if isinstance(prop.value, bool):
 							attributes_to_include[prop.name] = str(prop.value).lower()
@@ -1087,7 +1138,7 @@ class DOMTreeSerializer:
 
 		# Special handling for form elements - ensure current value is shown
 		# For text inputs, textareas, and selects, prioritize showing the current value from AX tree
-		if node.tag_name and node.tag_name.lower() in ['input', 'textarea', 'select']:
+		if node.tag_name in ('input', 'textarea', 'select'):
 			# ALWAYS check AX tree - it reflects actual typed value, DOM attribute may not update
 			if node.ax_node and node.ax_node.properties:
 				for prop in node.ax_node.properties:
@@ -1107,64 +1158,58 @@ class DOMTreeSerializer:
 		if not attributes_to_include:
 			return ''
 
-		# Remove duplicate values
-		ordered_keys = [key for key in include_attributes if key in attributes_to_include]
-
-		if len(ordered_keys) > 1:
-			keys_to_remove = set()
-			seen_values = {}
-
-			# Attributes that should never be removed as duplicates (they serve distinct purposes)
-			protected_attrs = {'format', 'expected_format', 'placeholder', 'value', 'aria-label', 'title'}
-
-			for key in ordered_keys:
-				value = attributes_to_include[key]
-				if len(value) > 5:
-					if value in seen_values and key not in protected_attrs:
-						keys_to_remove.add(key)
-					else:
-						seen_values[value] = key
-
-			for key in keys_to_remove:
+		# Remove duplicate values in a single pass (in include_attributes priority order)
+		seen_values: dict[str, str] = {}
+		for key in include_attributes:
+			value = attributes_to_include.get(key)
+			if value is None or len(value) <= 5:
+				continue
+			if value in seen_values and key not in DEDUPE_PROTECTED_ATTRIBUTES:
+				# An earlier attribute already carries this value
 				del attributes_to_include[key]
+			else:
+				seen_values[value] = key
 
 		# Remove attributes that duplicate accessibility data
+		node_name = node.node_name
 		role = node.ax_node.role if node.ax_node else None
-		if role and node.node_name == role:
+		if role and node_name == role:
 			attributes_to_include.pop('role', None)
 
 		# Remove type attribute if it matches the tag name (e.g. <button type="button">)
-		if 'type' in attributes_to_include and attributes_to_include['type'].lower() == node.node_name.lower():
+		type_value = attributes_to_include.get('type')
+		if type_value is not None and type_value.lower() == node.tag_name:
 			del attributes_to_include['type']
 
 		# Remove invalid attribute if it's false (only show when true)
-		if 'invalid' in attributes_to_include and attributes_to_include['invalid'].lower() == 'false':
+		invalid_value = attributes_to_include.get('invalid')
+		if invalid_value is not None and invalid_value.lower() == 'false':
 			del attributes_to_include['invalid']
 
-		boolean_attrs = {'required'}
-		for attr in boolean_attrs:
-			if attr in attributes_to_include and attributes_to_include[attr].lower() in {'false', '0', 'no'}:
-				del attributes_to_include[attr]
+		required_value = attributes_to_include.get('required')
+		if required_value is not None and required_value.lower() in {'false', '0', 'no'}:
+			del attributes_to_include['required']
 
 		# Remove aria-expanded if we have expanded (prefer AX tree over HTML attribute)
 		if 'expanded' in attributes_to_include and 'aria-expanded' in attributes_to_include:
 			del attributes_to_include['aria-expanded']
 
-		attrs_to_remove_if_text_matches = ['aria-label', 'placeholder', 'title']
-		for attr in attrs_to_remove_if_text_matches:
-			if attributes_to_include.get(attr) and attributes_to_include.get(attr, '').strip().lower() == text.strip().lower():
-				del attributes_to_include[attr]
+		text_lower: str | None = None
+		for attr in ('aria-label', 'placeholder', 'title'):
+			value = attributes_to_include.get(attr)
+			if value:
+				if text_lower is None:
+					text_lower = text.strip().lower()
+				if value.strip().lower() == text_lower:
+					del attributes_to_include[attr]
 
 		if attributes_to_include:
-			# Format attributes, wrapping empty values in quotes for clarity
-			formatted_attrs = []
-			for key, value in attributes_to_include.items():
-				capped_value = cap_text_length(value, 100)
-				# Show empty values as key='' instead of key=
-				if not capped_value:
-					formatted_attrs.append(f"{key}=''")
-				else:
-					formatted_attrs.append(f'{key}={capped_value}')
-			return ' '.join(formatted_attrs)
+			# Format attributes, showing empty values as key='' instead of key= for clarity
+			return ' '.join(
+				[
+					key + '=' + cap_text_length(value, 100) if value else key + "=''"
+					for key, value in attributes_to_include.items()
+				]
+			)
 
 		return ''
@@ -0,0 +1,28 @@
+# @file purpose: Helpers shared by the compact DOM serializers
+
+from browser_use.dom.utils import cap_text_length
+from browser_use.dom.views import NodeType, SimplifiedNode
+
+
+def collect_inline_text(node: SimplifiedNode, max_length: int) -> str:
+	"""Join the node's direct text children for inline display, capped at `max_length`, or '' if there is no direct text."""
+	children = node.children
+	# Leaf elements (most inputs, images, buttons without text) have nothing to scan
+	if not children:
+		return ''
+
+	text_parts = []
+	text_node = NodeType.TEXT_NODE
+	for child in children:
+		child_orig = child.original_node
+		if child_orig.node_type == text_node:
+			node_value = child_orig.node_value
+			if node_value:
+				text = node_value.strip()
+				if len(text) > 1:
+					text_parts.append(text)
+
+	if not text_parts:
+		return ''
+
+	return cap_text_length(' '.join(text_parts), max_length)
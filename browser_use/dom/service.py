@@ -519,8 +519,9 @@ class DomService:
 			attributes: dict[str, str] | None = None
 			if 'attributes' in node and node['attributes']:
 				attributes = {}
-				for i in range(0, len(node['attributes']), 2):
-					attributes[node['attributes'][i]] = node['attributes'][i + 1]
+				node_attributes = node['attributes']
+				for i in range(0, len(node_attributes), 2):
+					attributes[node_attributes[i]] = node_attributes[i + 1]
 
 			shadow_root_type = None
 			if 'shadowRootType' in node and node['shadowRootType']:
@@ -630,7 +631,7 @@ class DomService:
 			dom_tree_node.is_visible = self.is_element_visible_according_to_all_parents(dom_tree_node, updated_html_frames)
 
 			# DEBUG: Log visibility info for form elements in iframes
-			if dom_tree_node.tag_name and dom_tree_node.tag_name.upper() in ['INPUT', 'SELECT', 'TEXTAREA', 'LABEL']:
+			if dom_tree_node.tag_name in ('input', 'select', 'textarea', 'label'):
 				attrs = dom_tree_node.attributes or {}
 				elem_id = attrs.get('id', '')
 				elem_name = attrs.get('name', '')
@@ -1,3 +1,6 @@
+import re
+
+
 def cap_text_length(text: str, max_length: int) -> str:
 	"""Cap text length for display."""
 	if len(text) <= max_length:
@@ -5,53 +8,16 @@ def cap_text_length(text: str, max_length: int) -> str:
 	return text[:max_length] + '...'
 
 
-def generate_css_selector_for_element(enhanced_node) -> str | None:
-	"""Generate a CSS selector using node properties from version 0.5.0 approach."""
-	import re
-
-	if not enhanced_node or not hasattr(enhanced_node, 'tag_name') or not enhanced_node.tag_name:
-		return None
-
-	# Get base selector from tag name (simplified since we don't have xpath in EnhancedDOMTreeNode)
-	tag_name = enhanced_node.tag_name.lower().strip()
-	if not tag_name or not re.match(r'^[a-zA-Z][a-zA-Z0-9-]*$', tag_name):
-		return None
-
-	css_selector = tag_name
-
-	# Add ID if available (most specific)
-	if enhanced_node.attributes and 'id' in enhanced_node.attributes:
-		element_id = enhanced_node.attributes['id']
-		if element_id and element_id.strip():
-			element_id = element_id.strip()
-			# Validate ID contains only valid characters for # selector
-			if re.match(r'^[a-zA-Z][a-zA-Z0-9_-]*$', element_id):
-				return f'#{element_id}'
-			else:
-				# For IDs with special characters ($, ., :, etc.), use attribute selector
-				# Escape quotes in the ID value
-				escaped_id = element_id.replace('"', '\\"')
-				return f'{tag_name}[id="{escaped_id}"]'
-
-	# Handle class attributes (from version 0.5.0 approach)
-	if enhanced_node.attributes and 'class' in enhanced_node.attributes and enhanced_node.attributes['class']:
-		# Define a regex pattern for valid class names in CSS
-		valid_class_name_pattern = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_-]*$')
-
-		# Iterate through the class attribute values
-		classes = enhanced_node.attributes['class'].split()
-		for class_name in classes:
-			# Skip empty class names
-			if not class_name.strip():
-				continue
-
-			# Check if the class name is valid
-			if valid_class_name_pattern.match(class_name):
-				# Append the valid class name to the CSS selector
-				css_selector += f'.{class_name}'
+# Selector patterns, compiled once at import rather than looked up on every call
+_TAG_NAME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9-]*$')
+_ID_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9_-]*$')
+_CLASS_NAME_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_-]*$')
+_WHITESPACE_RE = re.compile(r'\s+')
 
-	# Expanded set of safe attributes that are stable and useful for selection (from v0.5.0)
-	SAFE_ATTRIBUTES = {
+# Expanded set of safe attributes that are stable and useful for selection (from v0.5.0),
+# built once at import instead of on every call
+_SAFE_SELECTOR_ATTRIBUTES = frozenset(
+	{
 		# Data attributes (if they're stable in your application)
 		'id',
 		# Standard HTML attributes
@@ -75,54 +41,93 @@ def generate_css_selector_for_element(enhanced_node) -> str | None:
 		# Custom stable attributes (add any application-specific ones)
 		'href',
 		'target',
+		# Always include dynamic attributes (include_dynamic_attributes=True equivalent)
+		'data-id',
+		'data-qa',
+		'data-cy',
+		'data-testid',
 	}
+)
 
-	# Always include dynamic attributes (include_dynamic_attributes=True equivalent)
-	include_dynamic_attributes = True
-	if include_dynamic_attributes:
-		dynamic_attributes = {
-			'data-id',
-			'data-qa',
-			'data-cy',
-			'data-testid',
-		}
-		SAFE_ATTRIBUTES.update(dynamic_attributes)
+# Attribute values containing any of these are matched with a contains selector instead of equality.
+# One character-class search scans the value once, instead of one substring scan per character
+_SPECIAL_VALUE_RE = re.compile(r'["\'<>`\n\r\t]')
 
-	# Handle other attributes (from version 0.5.0 approach)
-	if enhanced_node.attributes:
-		for attribute, value in enhanced_node.attributes.items():
-			if attribute == 'class':
-				continue
-
-			# Skip invalid attribute names
-			if not attribute.strip():
-				continue
-
-			if attribute not in SAFE_ATTRIBUTES:
-				continue
-
-			# Escape special characters in attribute names
-			safe_attribute = attribute.replace(':', r'\:')
-
-			# Handle different value cases
-			if value == '':
-				css_selector += f'[{safe_attribute}]'
-			elif any(char in value for char in '"\'<>`\n\r\t'):
-				# Use contains for values with special characters
-				# For newline-containing text, only use the part before the newline
-				if '\n' in value:
-					value = value.split('\n')[0]
-				# Regex-substitute *any* whitespace with a single space, then strip.
-				collapsed_value = re.sub(r'\s+', ' ', value).strip()
-				# Escape embedded double-quotes.
-				safe_value = collapsed_value.replace('"', '\\"')
-				css_selector += f'[{safe_attribute}*="{safe_value}"]'
+
+def generate_css_selector_for_element(enhanced_node) -> str | None:
+	"""Generate a CSS selector using node properties from version 0.5.0 approach."""
+	if not enhanced_node or not hasattr(enhanced_node, 'tag_name') or not enhanced_node.tag_name:
+		return None
+
+	# Get base selector from tag name (simplified since we don't have xpath in EnhancedDOMTreeNode)
+	tag_name = enhanced_node.tag_name.lower().strip()
+	if not tag_name or not _TAG_NAME_RE.match(tag_name):
+		return None
+
+	# Elements without attributes can only be selected by tag name
+	attributes = enhanced_node.attributes
+	if not attributes:
+		return tag_name
+
+	# Selector fragments are collected and joined once at the end instead of concatenated one by one
+	parts = [tag_name]
+
+	# Add ID if available (most specific)
+	if 'id' in attributes:
+		element_id = attributes['id']
+		# Strip once and reuse the result for the emptiness check and the selector
+		element_id = element_id.strip() if element_id else ''
+		if element_id:
+			# Validate ID contains only valid characters for # selector
+			if _ID_RE.match(element_id):
+				return f'#{element_id}'
 			else:
-				css_selector += f'[{safe_attribute}="{value}"]'
+				# For IDs with special characters ($, ., :, etc.), use attribute selector
+				# Escape quotes in the ID value
+				escaped_id = element_id.replace('"', '\\"')
+				return f'{tag_name}[id="{escaped_id}"]'
+
+	# Handle class attributes (from version 0.5.0 approach)
+	class_attr = attributes.get('class')
+	if class_attr:
+		# Iterate through the class attribute values - split() never yields empty or whitespace-only names
+		classes = class_attr.split()
+		for class_name in classes:
+			# Check if the class name is valid
+			if _CLASS_NAME_RE.match(class_name):
+				# Append the valid class name to the CSS selector
+				parts.append(f'.{class_name}')
+
+	# Handle other attributes (from version 0.5.0 approach)
+	for attribute, value in attributes.items():
+		# A single set probe also rules out 'class' and blank attribute names, neither of which is in the set
+		if attribute not in _SAFE_SELECTOR_ATTRIBUTES:
+			continue
+
+		# Escape special characters in attribute names
+		safe_attribute = attribute.replace(':', r'\:')
+
+		# Handle different value cases
+		if value == '':
+			parts.append(f'[{safe_attribute}]')
+		elif _SPECIAL_VALUE_RE.search(value):
+			# Use contains for values with special characters
+			# For newline-containing text, only use the part before the newline
+			if '\n' in value:
+				value = value.split('\n')[0]
+			# Regex-substitute *any* whitespace with a single space, then strip.
+			collapsed_value = _WHITESPACE_RE.sub(' ', value).strip()
+			# Escape embedded double-quotes.
+			safe_value = collapsed_value.replace('"', '\\"')
+			parts.append(f'[{safe_attribute}*="{safe_value}"]')
+		else:
+			parts.append(f'[{safe_attribute}="{value}"]')
+
+	css_selector = ''.join(parts)
 
 	# Final validation: ensure the selector is safe and doesn't contain problematic characters
 	# Note: quotes are allowed in attribute selectors like [name="value"]
-	if css_selector and not any(char in css_selector for char in ['\n', '\r', '\t']):
+	if css_selector and '\n' not in css_selector and '\r' not in css_selector and '\t' not in css_selector:
 		return css_selector
 
 	# If we get here, the selector was problematic, return just the tag name as fallback
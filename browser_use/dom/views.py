@@ -389,6 +389,9 @@ class EnhancedDOMTreeNode:
 	# Compound control child components information
 	_compound_children: list[dict[str, Any]] = field(default_factory=list)
 
+	# Memoized result of is_actually_scrollable, None until first computed
+	_is_actually_scrollable: bool | None = field(default=None, compare=False, repr=False)
+
 	uuid: str = field(default_factory=uuid7str)
 
 	@property
@@ -513,10 +516,9 @@ class EnhancedDOMTreeNode:
 		@DEV ! don't display this to the LLM, it's SUPER long
 		"""
 		attributes = ', '.join([f'{k}={v}' for k, v in self.attributes.items()])
-		is_scrollable = getattr(self, 'is_scrollable', False)
 		num_children = len(self.children_nodes or [])
 		return (
-			f'<{self.tag_name} {attributes} is_scrollable={is_scrollable} '
+			f'<{self.tag_name} {attributes} is_scrollable={self.is_scrollable} '
 			f'num_children={num_children} >{self.node_value}</{self.tag_name}>'
 		)
 
@@ -533,11 +535,13 @@ class EnhancedDOMTreeNode:
 		This matches exactly what goes into the DOMTreeSerializer output.
 		"""
 		meaningful_text = ''
-		if hasattr(self, 'attributes') and self.attributes:
+		attributes = self.attributes
+		if attributes:
 			# Priority order: value, aria-label, title, placeholder, alt, text content
-			for attr in ['value', 'aria-label', 'title', 'placeholder', 'alt']:
-				if attr in self.attributes and self.attributes[attr]:
-					meaningful_text = self.attributes[attr]
+			for attr in ('value', 'aria-label', 'title', 'placeholder', 'alt'):
+				value = attributes.get(attr)
+				if value:
+					meaningful_text = value
 					break
 
 		# Fallback to text content if no meaningful attributes
@@ -553,7 +557,16 @@ class EnhancedDOMTreeNode:
 
 		This detects scrollable elements that Chrome's CDP might miss, which is common
 		in iframes and dynamically sized containers.
+
+		The result is memoized on the node, since every serializer pass asks for it per element.
 		"""
+		is_actually_scrollable = self._is_actually_scrollable
+		if is_actually_scrollable is None:
+			is_actually_scrollable = self._is_actually_scrollable = self._detect_actually_scrollable()
+		return is_actually_scrollable
+
+	def _detect_actually_scrollable(self) -> bool:
+		"""Uncached scroll detection backing `is_actually_scrollable`."""
 		# First check if CDP already detected it as scrollable
 		if self.is_scrollable:
 			return True
@@ -593,7 +606,7 @@ class EnhancedDOMTreeNode:
 					# No CSS info, but content overflows - be more conservative
 					# Only consider it scrollable if it's a common scrollable container element
 					scrollable_tags = {'div', 'main', 'section', 'article', 'aside', 'body', 'html'}
-					return self.tag_name.lower() in scrollable_tags
+					return self.tag_name in scrollable_tags
 
 		return False
 
@@ -608,7 +621,7 @@ class EnhancedDOMTreeNode:
 		"""
 		# Special case: Always show scroll info for iframe elements
 		# Even if not detected as scrollable, they might have scrollable content
-		if self.tag_name.lower() == 'iframe':
+		if self.tag_name == 'iframe':
 			return True
 
 		# Must be scrollable first for non-iframe elements
@@ -616,7 +629,7 @@ class EnhancedDOMTreeNode:
 			return False
 
 		# Always show for iframe content documents (body/html)
-		if self.tag_name.lower() in {'body', 'html'}:
+		if self.tag_name in {'body', 'html'}:
 			return True
 
 		# Don't show if parent is already scrollable (avoid nested spam)
@@ -631,13 +644,13 @@ class EnhancedDOMTreeNode:
 			return None
 
 		# Check if content document itself is HTML
-		if self.content_document.tag_name.lower() == 'html':
+		if self.content_document.tag_name == 'html':
 			return self.content_document
 
 		# Look through children for HTML element
 		if self.content_document.children_nodes:
 			for child in self.content_document.children_nodes:
-				if child.tag_name.lower() == 'html':
+				if child.tag_name == 'html':
 					return child
 
 		return None
@@ -716,7 +729,7 @@ class EnhancedDOMTreeNode:
 	def get_scroll_info_text(self) -> str:
 		"""Get human-readable scroll information text for this element."""
 		# Special case for iframes: check content document for scroll info
-		if self.tag_name.lower() == 'iframe':
+		if self.tag_name == 'iframe':
 			# Try to get scroll info from the HTML document inside the iframe
 			if self.content_document:
 				# Look for HTML element in content document
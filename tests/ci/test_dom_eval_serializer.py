@@ -0,0 +1,106 @@
+"""
+Test the eval DOM serializer on hand-built trees: empty-subtree pruning combined with list and link truncation.
+
+Usage:
+	uv run pytest tests/ci/test_dom_eval_serializer.py -v -s
+"""
+
+from itertools import count
+
+from browser_use.dom.serializer.eval_serializer import DOMEvalSerializer
+from browser_use.dom.views import DEFAULT_INCLUDE_ATTRIBUTES, EnhancedDOMTreeNode, EnhancedSnapshotNode, NodeType, SimplifiedNode
+
+_node_ids = count(1)
+
+
+def _dom_node(node_type: NodeType, node_name: str, node_value: str = '', visible: bool = True) -> EnhancedDOMTreeNode:
+	node_id = next(_node_ids)
+	return EnhancedDOMTreeNode(
+		node_id=node_id,
+		backend_node_id=node_id,
+		node_type=node_type,
+		node_name=node_name,
+		node_value=node_value,
+		attributes={},
+		is_scrollable=False,
+		is_visible=visible,
+		absolute_position=None,
+		target_id='target',
+		frame_id=None,
+		session_id=None,
+		content_document=None,
+		shadow_root_type=None,
+		shadow_roots=None,
+		parent_node=None,
+		children_nodes=None,
+		ax_node=None,
+		snapshot_node=EnhancedSnapshotNode(
+			is_clickable=None,
+			cursor_style=None,
+			bounds=None,
+			clientRects=None,
+			scrollRects=None,
+			computed_styles=None,
+			paint_order=None,
+			stacking_contexts=None,
+		),
+	)
+
+
+def _element(tag: str, *children: SimplifiedNode, visible: bool = True) -> SimplifiedNode:
+	return SimplifiedNode(original_node=_dom_node(NodeType.ELEMENT_NODE, tag.upper(), visible=visible), children=list(children))
+
+
+def _text(value: str) -> SimplifiedNode:
+	return SimplifiedNode(original_node=_dom_node(NodeType.TEXT_NODE, '#text', value), children=[])
+
+
+def _build_tree() -> SimplifiedNode:
+	# 55 list items: the first one is hidden and renders nothing, but it still counts towards the 50 item cap
+	items = [_element('li', visible=False)] + [_element('li', _text(f'Item {i}')) for i in range(1, 55)]
+	# A hidden wrapper whose whole subtree is hidden as well
+	hidden = _element('span', _element('i', visible=False), visible=False)
+	# 55 consecutive links followed by a paragraph that ends the run
+	links = [_element('a', _text(f'Link {i}')) for i in range(55)]
+	return _element(
+		'body',
+		_element('ul', *items, hidden),
+		_element('nav', *links, _element('p', _text('After links'))),
+	)
+
+
+def test_eval_serializer_prunes_empty_subtrees_and_truncates():
+	root = _build_tree()
+	output = DOMEvalSerializer.serialize_tree(root, DEFAULT_INCLUDE_ATTRIBUTES)
+	lines = output.split('\n')
+
+	# Hidden subtrees produce no lines at all
+	assert not any('<span' in line or '<i' in line for line in lines)
+
+	# Only 49 items render (the hidden first item used up one slot), then the truncation marker
+	assert sum('<li>' in line for line in lines) == 49
+	assert '\t\t<li>Item 49' in lines
+	assert '\t\t<li>Item 50' not in lines
+	assert '\t\t... (5 more items in this list (truncated) use evaluate to get more.' in lines
+
+	# The link run is capped at 50 and the marker is emitted before the element that ends the run
+	assert sum('<a>' in line for line in lines) == 50
+	marker = lines.index('\t\t... (5 more links in this list)')
+	assert lines[marker - 1] == '\t\t<a>Link 49'
+	assert lines[marker + 1] == '\t\t<p>After links'
+
+	# Pruning state is per pass, so serializing the same tree again gives the same result
+	assert DOMEvalSerializer.serialize_tree(root, DEFAULT_INCLUDE_ATTRIBUTES) == output
+
+
+def test_eval_serializer_keeps_truncation_markers_of_pass_through_nodes():
+	# An invisible list whose items all render nothing still reports the items over the cap
+	hidden_list = _element('ul', *[_element('li', visible=False) for _ in range(55)], visible=False)
+	output = DOMEvalSerializer.serialize_tree(_element('body', hidden_list), DEFAULT_INCLUDE_ATTRIBUTES)
+	assert output == '<body />\n\t... (5 more items in this list (truncated) use evaluate to get more.'
+
+	# The same holds for a wrapper excluded by its parent that only holds hidden links
+	wrapper = _element('div', *[_element('a', visible=False) for _ in range(55)])
+	wrapper.excluded_by_parent = True
+	output = DOMEvalSerializer.serialize_tree(_element('body', wrapper), DEFAULT_INCLUDE_ATTRIBUTES)
+	assert output == '<body />\n\t... (5 more links in this list) (truncated) use evaluate to get more.'
@@ -0,0 +1,139 @@
+"""
+Test DOMTreeSerializer on hand-built trees: selector map, bounding-box filtering and new-element marking.
+
+Usage:
+	uv run pytest tests/ci/test_dom_tree_serializer.py -v -s
+"""
+
+from itertools import count
+
+from browser_use.dom.serializer.serializer import DOMTreeSerializer
+from browser_use.dom.views import (
+	DEFAULT_INCLUDE_ATTRIBUTES,
+	DOMRect,
+	EnhancedDOMTreeNode,
+	EnhancedSnapshotNode,
+	NodeType,
+	SerializedDOMState,
+)
+
+_backend_node_ids = count(1)
+
+
+def _node(
+	node_type: NodeType,
+	node_name: str,
+	*children: EnhancedDOMTreeNode,
+	node_id: int | None = None,
+	node_value: str = '',
+	attributes: dict[str, str] | None = None,
+	bounds: DOMRect | None = None,
+	scroll_height: float | None = None,
+	target_id: str = 'main-target',
+) -> EnhancedDOMTreeNode:
+	backend_node_id = next(_backend_node_ids)
+	bounds = bounds or DOMRect(x=0, y=0, width=100, height=20)
+	# Content taller than the box, with scrolling allowed, makes the element actually scrollable
+	scroll_rects = DOMRect(x=0, y=0, width=bounds.width, height=scroll_height) if scroll_height else None
+	node = EnhancedDOMTreeNode(
+		node_id=backend_node_id if node_id is None else node_id,
+		backend_node_id=backend_node_id,
+		node_type=node_type,
+		node_name=node_name,
+		node_value=node_value,
+		attributes=attributes or {},
+		is_scrollable=None,
+		is_visible=True,
+		absolute_position=bounds,
+		target_id=target_id,
+		frame_id=None,
+		session_id=None,
+		content_document=None,
+		shadow_root_type=None,
+		shadow_roots=None,
+		parent_node=None,
+		children_nodes=list(children),
+		ax_node=None,
+		snapshot_node=EnhancedSnapshotNode(
+			is_clickable=None,
+			cursor_style=None,
+			bounds=bounds,
+			clientRects=bounds,
+			scrollRects=scroll_rects,
+			computed_styles={'overflow': 'auto'} if scroll_height else None,
+			paint_order=None,
+			stacking_contexts=None,
+		),
+	)
+	for child in children:
+		child.parent_node = node
+	return node
+
+
+def _element(tag: str, *children: EnhancedDOMTreeNode, **kwargs) -> EnhancedDOMTreeNode:
+	return _node(NodeType.ELEMENT_NODE, tag.upper(), *children, **kwargs)
+
+
+def _text(value: str) -> EnhancedDOMTreeNode:
+	return _node(NodeType.TEXT_NODE, '#text', node_value=value)
+
+
+def _document(*body_children: EnhancedDOMTreeNode) -> EnhancedDOMTreeNode:
+	return _node(NodeType.DOCUMENT_NODE, '#document', _element('html', _element('body', *body_children)))
+
+
+def _serialize(root: EnhancedDOMTreeNode, previous_state: SerializedDOMState | None = None) -> SerializedDOMState:
+	state, _ = DOMTreeSerializer(root, previous_state).serialize_accessible_elements()
+	return state
+
+
+def test_scrollable_containers_sharing_a_node_id_are_checked_separately():
+	# CDP node ids are per target, so a merged cross-origin iframe tree can repeat an id from the main frame
+	button = _element('button', _text('Save'))
+	with_button = _element('div', button, node_id=500, scroll_height=400)
+	without_button = _element('div', _text('Plain scrolling text'), node_id=500, scroll_height=400, target_id='iframe-target')
+	outer = _element('div', with_button, without_button, scroll_height=900)
+
+	state = _serialize(_document(outer))
+
+	# The button makes the first container (and the outer one) non-interactive, the second container has no
+	# interactive descendants and must become interactive itself
+	assert set(state.selector_map) == {button.backend_node_id, without_button.backend_node_id}
+
+
+def test_tree_serializer_filters_contained_children_and_marks_new_elements():
+	# A clickable search icon that sits fully inside a link
+	search_icon = _element(
+		'span', _text('Inner'), attributes={'class': 'search-icon'}, bounds=DOMRect(x=10, y=10, width=50, height=20)
+	)
+	link = _element('a', search_icon, attributes={'href': '/docs'}, bounds=DOMRect(x=0, y=0, width=200, height=40))
+	first_input = _element('input', attributes={'type': 'text', 'name': 'q'}, bounds=DOMRect(x=0, y=100, width=200, height=30))
+	# Non-interactive wrappers around the input are optimized away
+	wrapped_input = _element('div', _element('span', first_input))
+	second_input = _element(
+		'input', attributes={'type': 'text', 'name': 'email'}, bounds=DOMRect(x=0, y=200, width=200, height=30)
+	)
+	root = _document(link, wrapped_input, second_input)
+
+	# Without bounding-box filtering the icon gets its own index
+	unfiltered_state, _ = DOMTreeSerializer(root, enable_bbox_filtering=False).serialize_accessible_elements()
+	assert list(unfiltered_state.selector_map) == [
+		link.backend_node_id,
+		search_icon.backend_node_id,
+		first_input.backend_node_id,
+		second_input.backend_node_id,
+	]
+
+	# With it, the icon is folded into the link and only its text remains
+	state = _serialize(root)
+	assert list(state.selector_map) == [link.backend_node_id, first_input.backend_node_id, second_input.backend_node_id]
+
+	# Against a previous state that only knew the link, both inputs are marked as new
+	previous_state = SerializedDOMState(_root=None, selector_map={link.backend_node_id: link})
+	state = _serialize(root, previous_state)
+	assert state.llm_representation(include_attributes=DEFAULT_INCLUDE_ATTRIBUTES).split('\n') == [
+		f'[{link.backend_node_id}]<a />',
+		'\tInner',
+		f'*[{first_input.backend_node_id}]<input type=text name=q />',
+		f'*[{second_input.backend_node_id}]<input type=text name=email />',
+	]